@@ -2,15 +2,21 @@
 """
 Xcode Project File Updater for VoiceControl
 
-This script automatically adds new Swift files to the Xcode project configuration.
-It handles the complex task of updating project.pbxproj with proper UUIDs and references.
+This script automatically adds new source and resource files to the Xcode project configuration.
+It handles the complex task of updating project.pbxproj with proper object IDs and references.
 
 Usage:
-    python3 add_files_simple.py
+    python3 add_files_simple.py                  # add new files
+    python3 add_files_simple.py --sync           # also remove references to deleted files
+    python3 add_files_simple.py --normalize      # sort sections and groups, dedupe build files
+    python3 add_files_simple.py --watch          # add files as they appear on disk
+    python3 add_files_simple.py --daemon         # keep the project hot for scripts/add_files_client.py
+    python3 add_files_simple.py --merge-driver BASE OURS THEIRS   # git merge driver
+    python3 add_files_simple.py --workspace      # update every project of the .xcworkspace
 
 The script will:
-1. Scan for new Swift files not already in the project
-2. Generate unique UUIDs for each file
+1. Scan for new source files (Swift, Objective-C, Metal, resources) not already in the project
+2. Derive object IDs from file paths, so the same change yields the same IDs everywhere
 3. Update the project.pbxproj with proper references
 4. Maintain the existing project structure
 """
@@ -19,197 +25,3052 @@ import os
 import re
 import uuid
 import json
+import marshal
+import mmap
+import struct
+import hashlib
+import tempfile
+import time
+import cProfile
+import contextlib
+import tracemalloc
+import io
+import signal
+import socket
+import sys
+import select
+import ctypes
+import ctypes.util
+import errno
+import resource
+import posixpath
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from xml.etree import ElementTree
+
+
+class PbxprojParseError(Exception):
+    """Raised when project.pbxproj is not a well-formed OpenStep plist"""
+
+
+class PbxList(list):
+    """Array value that remembers the offsets of its parens in the source"""
+    __slots__ = ('open', 'close')
+
+
+def map_file(f):
+    """Return a read-only memory map of an open binary file, or its bytes if it can't be mapped"""
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):
+        # Empty files and pipes can't be mapped
+        return f.read()
+
+
+class PbxprojParser:
+    """Single-pass tokenizer/parser for the OpenStep plist format of project.pbxproj
+
+    Comments and whitespace are skipped by the token pattern itself, so the
+    whole file is consumed in one linear scan. The source is a bytes-like
+    buffer (usually a memory map of the file); only the extracted strings are
+    decoded, each distinct one once. Entries of the top-level `objects`
+    dictionary get their source span recorded so callers can edit the
+    original bytes in place.
+    """
+
+    TOKEN_PATTERN = re.compile(
+        rb'(?:\s+|/\*.*?\*/|//[^\n]*)*'
+        rb'(?:([{}()=;,])|"((?:[^"\\]|\\.)*)"|((?:[^\s{}()=;,"/]|/(?![/*]))+)|\Z)',
+        re.DOTALL
+    )
+    ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+    ESCAPES = {'n': '\n', 't': '\t', 'r': '\r'}
+
+    def __init__(self, text, start=0, end=None):
+        self.text = text
+        self.spans = {}
+        self._next = self.TOKEN_PATTERN.scanner(text, start, len(text) if end is None else end).match
+        self._pos = start
+        self._strings = {}
+
+    def parse(self):
+        """Parse the whole file and return the root dictionary"""
+        if self._token().group(1) != b'{':
+            raise PbxprojParseError("Top-level value is not a dictionary")
+        root = self._dict(root=True)
+        if self._token().lastindex is not None:
+            raise PbxprojParseError(f"Trailing data at offset {self._pos}")
+        return root
+
+    def entries(self):
+        """Yield (key, value) for each dictionary entry as soon as it is parsed
+
+        Stops at the closing brace of the dictionary being read, or at the
+        end of the scanned range.
+        """
+        for key, value_match in self._keys():
+            value = self._value(value_match)
+            self._expect(b';')
+            yield key, value
+
+    def objects(self):
+        """Yield (id, object) of the top-level objects dictionary as each is parsed
+
+        Nothing after the objects dictionary is read.
+        """
+        if self._token().group(1) != b'{':
+            raise PbxprojParseError("Top-level value is not a dictionary")
+        for key, value_match in self._keys():
+            if key == 'objects' and value_match.group(1) == b'{':
+                yield from self.entries()
+                return
+            self._value(value_match)
+            self._expect(b';')
+
+    def _keys(self):
+        """Yield (key, match of the value's first token) until the dictionary closes"""
+        while True:
+            match = self._token()
+            if match.group(1) == b'}' or match.lastindex is None:
+                return
+            key = self._value(match)
+            if not isinstance(key, str):
+                raise PbxprojParseError(f"Dictionary key is not a string at offset {match.start()}")
+            self._expect(b'=')
+            yield key, self._token()
+
+    def _token(self):
+        match = self._next()
+        if match is None:
+            raise PbxprojParseError(f"Unexpected character at offset {self._pos}")
+        self._pos = match.end()
+        return match
+
+    def _value(self, match):
+        punct, quoted, bare = match.groups()
+        if punct == b'{':
+            return self._dict()
+        if punct == b'(':
+            return self._list(match.start(1))
+        raw = quoted if quoted is not None else bare
+        if raw is None:
+            raise PbxprojParseError(f"Unexpected token at offset {match.start()}")
+        value = self._strings.get(raw)
+        if value is None:
+            if quoted is not None and b'\\' in raw:
+                return self.decode(raw, True, match.start())
+            value = self._strings[raw] = self.decode(raw, offset=match.start())
+        return value
+
+    @classmethod
+    def decode(cls, raw, quoted=False, offset=0):
+        """Return the string value of a raw token, unescaping quoted ones"""
+        try:
+            value = raw.decode('utf-8')
+        except UnicodeDecodeError:
+            raise PbxprojParseError(f"Invalid UTF-8 at offset {offset}") from None
+        if quoted and '\\' in value:
+            return cls.ESCAPE_PATTERN.sub(lambda m: cls.ESCAPES.get(m.group(1), m.group(1)), value)
+        return value
+
+    @staticmethod
+    def token_start(match):
+        """Return the offset where a matched string token begins, opening quote included"""
+        if match.group(2) is not None:
+            return match.start(2) - 1
+        return match.start(match.lastindex)
+
+    def _expect(self, punct):
+        match = self._token()
+        if match.group(1) != punct:
+            raise PbxprojParseError(f"Expected '{punct.decode()}' at offset {match.start()}")
+
+    def _dict(self, spans=None, root=False):
+        result = {}
+        while True:
+            match = self._token()
+            if match.group(1) == b'}':
+                return result
+            key = self._value(match)
+            if not isinstance(key, str):
+                raise PbxprojParseError(f"Dictionary key is not a string at offset {match.start()}")
+            self._expect(b'=')
+            value_match = self._token()
+            if root and key == 'objects' and value_match.group(1) == b'{':
+                result[key] = self._dict(spans=self.spans)
+            else:
+                result[key] = self._value(value_match)
+            self._expect(b';')
+            if spans is not None:
+                spans[key] = (self.token_start(match), self._pos)
+
+    def _list(self, open_offset):
+        result = PbxList()
+        result.open = open_offset
+        while True:
+            match = self._token()
+            if match.group(1) == b')':
+                result.close = match.start(1)
+                return result
+            result.append(self._value(match))
+            match = self._token()
+            if match.group(1) == b')':
+                result.close = match.start(1)
+                return result
+            if match.group(1) != b',':
+                raise PbxprojParseError(f"Expected ',' at offset {match.start()}")
+
+
+UNQUOTED_STRING = re.compile(r'[A-Za-z0-9_$./]+\Z')
+
+
+def pbx_string(value):
+    """Format `value` as a pbxproj string, quoting it when needed"""
+    if UNQUOTED_STRING.match(value):
+        return value
+    escaped = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\t', '\\t')
+    return f'"{escaped}"'
+
+
+# Extension -> (lastKnownFileType, build phase isa) of every file type the updater adds
+FILE_TYPES = {
+    '.swift': ('sourcecode.swift', 'PBXSourcesBuildPhase'),
+    '.m': ('sourcecode.c.objc', 'PBXSourcesBuildPhase'),
+    '.metal': ('sourcecode.metal', 'PBXSourcesBuildPhase'),
+    '.h': ('sourcecode.c.h', 'PBXHeadersBuildPhase'),
+    '.json': ('text.json', 'PBXResourcesBuildPhase'),
+    '.strings': ('text.plist.strings', 'PBXResourcesBuildPhase'),
+    '.xcassets': ('folder.assetcatalog', 'PBXResourcesBuildPhase'),
+}
+
+# Directories Xcode treats as a single file
+PACKAGE_SUFFIXES = ('.xcassets',)
+
+
+def file_type(path):
+    """Return (lastKnownFileType, build phase isa) for `path`, or None if it isn't added"""
+    return FILE_TYPES.get(posixpath.splitext(path)[1].lower())
+
+
+def phase_name(isa):
+    """Return the display name of a build phase isa, e.g. Sources"""
+    return isa[len('PBX'):-len('BuildPhase')]
+
+
+class ProjectGraph:
+    """Object graph of a parsed project.pbxproj, keyed by object ID
+
+    Alongside the objects it keeps an index built once per parse: the
+    source span of every object, the IDs of each isa in file order, and (on
+    first use) the resolved group tree and the offsets of each section's
+    Begin/End markers. Lookups and insertion points come from the index, so their
+    cost no longer grows with the size of the file.
+    """
+
+    def __init__(self, text, root=None, spans=None):
+        self.text = text
+        if root is None:
+            parser = PbxprojParser(text)
+            root, spans = parser.parse(), parser.spans
+        self.root = root
+        self.objects = self.root.get('objects', {})
+        self.spans = spans
+        self.ids_by_isa = {}
+        for object_id, obj in self.objects.items():
+            self.ids_by_isa.setdefault(obj.get('isa'), []).append(object_id)
+        self._sections = {}
+        self._file_paths = None
+        self._group_dirs = None
+        self._variant_groups = None
+        self._target_phases = None
+
+    def objects_of_isa(self, isa):
+        """Return (id, object) pairs of the given isa, in file order"""
+        return [(object_id, self.objects[object_id]) for object_id in self.ids_by_isa.get(isa, ())]
+
+    GROUP_ISAS = ('PBXGroup', 'PBXVariantGroup', 'XCVersionGroup')
+
+    def file_paths(self):
+        """Return {path: file reference ID} with paths resolved through the group tree
+
+        Paths are relative to the project's root directory (the one holding
+        the .xcodeproj). File references outside the tree are keyed by their
+        own path.
+        """
+        if self._file_paths is None:
+            self.resolve_tree()
+        return self._file_paths
+
+    def group_dirs(self):
+        """Return {directory: group ID} for every group in the tree
+
+        Groups without a path of their own share their parent's directory;
+        the first group reached for a directory (the outermost) wins.
+        """
+        if self._group_dirs is None:
+            self.resolve_tree()
+        return self._group_dirs
+
+    def variant_groups(self):
+        """Return {path: variant group ID}, e.g. VoiceControl/Localizable.strings
+
+        A variant group's path is its name in the directory holding its
+        .lproj folders.
+        """
+        if self._variant_groups is None:
+            self.resolve_tree()
+        return self._variant_groups
+
+    def resolve_tree(self):
+        """Walk the group tree once from the main group, resolving every path"""
+        project = self.objects.get(self.root.get('rootObject'), {})
+        project_dir = posixpath.normpath(project.get('projectDirPath') or '.')
+        paths = {}
+        group_dirs = {}
+        variant_groups = {}
+        visited = set()
+        pending = [(project.get('mainGroup'), project_dir)]
+        while pending:
+            object_id, parent_dir = pending.pop()
+            obj = self.objects.get(object_id)
+            if obj is None or object_id in visited:
+                continue
+            visited.add(object_id)
+            path = obj.get('path')
+            source_tree = obj.get('sourceTree', '<group>')
+            if source_tree == '<group>':
+                resolved = posixpath.normpath(posixpath.join(parent_dir, path)) if path else parent_dir
+            elif source_tree == 'SOURCE_ROOT':
+                resolved = posixpath.normpath(posixpath.join(project_dir, path or ''))
+            elif source_tree == '<absolute>':
+                resolved = path
+            else:
+                continue  # Build products and SDK files aren't part of the source tree
+            if obj.get('isa') in self.GROUP_ISAS:
+                if obj.get('isa') == 'PBXGroup':
+                    group_dirs.setdefault(resolved, object_id)
+                elif obj.get('isa') == 'PBXVariantGroup' and obj.get('name'):
+                    variant_groups.setdefault(posixpath.join(resolved, obj['name']), object_id)
+                pending.extend((child, resolved) for child in reversed(obj.get('children', ())))
+            elif obj.get('isa') == 'PBXFileReference' and resolved:
+                paths.setdefault(resolved, object_id)
+
+        for object_id in self.ids_by_isa.get('PBXFileReference', ()):
+            obj = self.objects[object_id]
+            if object_id not in visited and obj.get('path') and obj.get('sourceTree', '<group>') in ('<group>', 'SOURCE_ROOT'):
+                paths.setdefault(posixpath.normpath(posixpath.join(project_dir, obj['path'])), object_id)
+        self._file_paths = paths
+        self._group_dirs = group_dirs
+        self._variant_groups = variant_groups
+
+    def target_phases(self):
+        """Return {target ID: {phase isa: phase ID}} for every native target
+
+        Only the first phase of each isa counts, matching how Xcode adds
+        files from the target membership checkboxes.
+        """
+        if self._target_phases is None:
+            self._target_phases = {}
+            for target_id, target in self.objects_of_isa('PBXNativeTarget'):
+                phases = {}
+                for phase_id in target.get('buildPhases', ()):
+                    isa = self.objects.get(phase_id, {}).get('isa')
+                    if isa:
+                        phases.setdefault(isa, phase_id)
+                self._target_phases[target_id] = phases
+        return self._target_phases
+
+    def list_items(self, value):
+        """Return (item, start, end) for each string element of a parsed array
+
+        `end` is just past the element's trailing comma, so the span covers
+        any comment between the two. Only the array's own source range is
+        re-tokenized.
+        """
+        items = []
+        scanner = PbxprojParser.TOKEN_PATTERN.scanner(self.text, value.open + 1, value.close)
+        current = None
+        for match in iter(scanner.match, None):
+            punct, quoted, bare = match.groups()
+            if punct == b',' and current is not None:
+                items.append((current[0], current[1], match.end()))
+                current = None
+            elif quoted is not None or bare is not None:
+                if current is not None:
+                    items.append(current)
+                raw = quoted if quoted is not None else bare
+                current = (PbxprojParser.decode(raw, quoted is not None), PbxprojParser.token_start(match), match.end())
+            elif match.lastindex is None:
+                break
+        if current is not None:
+            items.append(current)
+        return items
+
+    def property_spans(self, object_id):
+        """Return {key: (key start, value start, value end, end)} for an object's properties
+
+        `end` is just past the property's semicolon. Only the object's own
+        source range is re-tokenized.
+        """
+        start, end = self.spans[object_id]
+        scanner = PbxprojParser.TOKEN_PATTERN.scanner(self.text, start, end)
+        match = scanner.match()
+        while match is not None and match.group(1) != b'{':
+            match = scanner.match()
+        properties = {}
+        depth = 1
+        key = None
+        for match in iter(scanner.match, None):
+            punct, quoted, bare = match.groups()
+            if match.lastindex is None:
+                break
+            if depth == 1 and key is None:
+                if punct == b'}':
+                    break
+                key = (PbxprojParser.decode(quoted if quoted is not None else bare, quoted is not None),
+                       PbxprojParser.token_start(match))
+                value_start = value_end = None
+            elif depth == 1 and punct == b'=' and value_start is None:
+                continue
+            elif depth == 1 and punct == b';':
+                if value_start is None:
+                    raise PbxprojParseError(f"Missing value for {key[0]!r} at offset {match.start()}")
+                properties[key[0]] = (key[1], value_start, value_end, match.end())
+                key = None
+            else:
+                if value_start is None:
+                    value_start = PbxprojParser.token_start(match)
+                if punct in (b'{', b'('):
+                    depth += 1
+                elif punct in (b'}', b')'):
+                    depth -= 1
+                value_end = match.end()
+        return properties
+
+    def section_range(self, isa):
+        """Return offsets of the Begin and End markers of the `isa` section
+
+        The markers are comments, so they are located by short searches
+        anchored at the first and last object of that isa rather than by
+        scanning the file. Either offset is -1 if its marker is missing.
+        """
+        if isa not in self._sections:
+            ids = self.ids_by_isa.get(isa)
+            begin_marker = f'/* Begin {isa} section */'.encode()
+            end_marker = f'/* End {isa} section */'.encode()
+            if ids:
+                begin = self.text.rfind(begin_marker, 0, self.spans[ids[0]][0])
+                end = self.text.find(end_marker, self.spans[ids[-1]][1])
+            else:
+                begin = self.text.find(begin_marker)
+                end = self.text.find(end_marker, max(begin, 0))
+            self._sections[isa] = (begin, end)
+        return self._sections[isa]
+
+    def section_end(self, isa):
+        """Return the offset of the End marker of the `isa` section, or -1"""
+        return self.section_range(isa)[1]
+
+
+class EditPlan:
+    """Batch of edits against an unmodified source buffer
+
+    Edits are gathered as replacements of [start, end) spans of the original
+    bytes (an insertion is an empty span) and applied in one ordered join, so
+    the cost of an update stays a single linear copy no matter how many
+    places it touches. Text edits are stored UTF-8 encoded.
+    """
+
+    def __init__(self):
+        self.edits = []
+
+    def __len__(self):
+        return len(self.edits)
+
+    def replace(self, start, end, text):
+        """Queue replacing [start, end) of the original buffer with `text`"""
+        if isinstance(text, str):
+            text = text.encode('utf-8')
+        # The sequence number keeps edits at the same offset in queue order
+        self.edits.append((start, end, len(self.edits), text))
+
+    def insert(self, offset, text):
+        """Queue `text` for insertion at `offset` of the original buffer"""
+        self.replace(offset, offset, text)
+
+    def delete(self, start, end):
+        """Queue removal of [start, end) of the original buffer"""
+        self.replace(start, end, b'')
+
+    def extract(self, start, end):
+        """Remove the edits inside [start, end) and return them in order
+
+        Insertions at `end` itself stay in the plan.
+        """
+        inside = []
+        outside = []
+        for edit in self.edits:
+            if start <= edit[0] < end and edit[1] <= end:
+                inside.append(edit)
+            else:
+                outside.append(edit)
+        self.edits = outside
+        return sorted(inside)
+
+    @staticmethod
+    def splice(source, edits, start, end):
+        """Return source[start:end] with `edits` (sorted, all inside it) applied"""
+        pieces = []
+        last = start
+        for edit_start, edit_end, _, text in edits:
+            if edit_start < last:
+                raise ValueError(f"Overlapping edits at offset {edit_start}")
+            pieces.append(source[last:edit_start])
+            pieces.append(text)
+            last = edit_end
+        pieces.append(source[last:end])
+        return b''.join(pieces)
+
+    def apply(self, source):
+        """Return `source` with every queued edit applied"""
+        return self.splice(source, sorted(self.edits), 0, len(source))
+
+
+class ProjectEditor:
+    """Format-preserving mutations of a parsed project
+
+    Every change is recorded as an edit of the original bytes, so
+    serialize() reproduces every untouched object byte for byte, comments
+    and whitespace included, and only the edited spans show up in a diff.
+    New objects and values are written the way Xcode writes them.
+    """
+
+    # Objects Xcode writes on a single line
+    INLINE_ISAS = ('PBXBuildFile', 'PBXFileReference')
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.plan = EditPlan()
+        self.new_objects = {}
+        self.reorders = []
+
+    @staticmethod
+    def format_value(value, indent='', inline=False):
+        """Format a value; (value, comment) pairs are written with a trailing comment"""
+        if isinstance(value, tuple):
+            return f"{pbx_string(value[0])} /* {value[1]} */"
+        inner = indent + '\t'
+        if isinstance(value, dict):
+            keys = sorted(value, key=lambda key: (key != 'isa', key))
+            if inline:
+                fields = [f"{pbx_string(key)} = {ProjectEditor.format_value(value[key], inline=True)}; " for key in keys]
+                return '{' + ''.join(fields) + '}'
+            fields = [f"{inner}{pbx_string(key)} = {ProjectEditor.format_value(value[key], inner)};\n" for key in keys]
+            return '{\n' + ''.join(fields) + indent + '}'
+        if isinstance(value, list):
+            if inline:
+                return '(' + ''.join(f"{ProjectEditor.format_value(item, inline=True)}, " for item in value) + ')'
+            elements = [f"{inner}{ProjectEditor.format_value(item, inner)},\n" for item in value]
+            return '(\n' + ''.join(elements) + indent + ')'
+        return pbx_string(value)
+
+    def line_span(self, start, end):
+        """Widen [start, end) to whole lines when nothing else shares them"""
+        text = self.graph.text
+        line_start = text.rfind(b'\n', 0, start) + 1
+        line_end = text.find(b'\n', end)
+        if line_end < 0:
+            line_end = len(text)
+        if not text[line_start:start].strip() and not text[end:line_end].strip():
+            return line_start, min(line_end + 1, len(text))
+        return start, end
+
+    def line_indent(self, offset):
+        """Return the leading whitespace of the line holding `offset`"""
+        line = self.graph.text[self.graph.text.rfind(b'\n', 0, offset) + 1:offset]
+        return line[:len(line) - len(line.lstrip())].decode('utf-8')
+
+    def add_object(self, object_id, obj, comment=None):
+        """Add an object to the end of its isa's section, creating the section if needed"""
+        inline = obj.get('isa') in self.INLINE_ISAS
+        header = f"\t\t{object_id} /* {comment} */ = " if comment else f"\t\t{object_id} = "
+        self.new_objects.setdefault(obj.get('isa'), []).append(
+            header + self.format_value(obj, '\t\t', inline) + ';')
+
+    def remove_object(self, object_id):
+        """Remove an object's entry from the objects dictionary"""
+        self.plan.delete(*self.line_span(*self.graph.spans[object_id]))
+
+    def remove_section(self, isa):
+        """Remove the whole `isa` section with the blank line after it
+
+        Returns False, removing nothing, if either marker is missing.
+        """
+        text = self.graph.text
+        begin, end = self.graph.section_range(isa)
+        if begin < 0 or end < 0:
+            return False
+        start = text.rfind(b'\n', 0, begin) + 1
+        stop = text.find(b'\n', end) + 1 or len(text)
+        if text[stop:stop + 1] == b'\n':
+            stop += 1
+        self.plan.delete(start, stop)
+        return True
+
+    def set_property(self, object_id, key, value):
+        """Set a property of an existing object, replacing only its value"""
+        self.write_property(object_id, key, lambda indent, inline: self.format_value(value, indent, inline))
+
+    def set_property_text(self, object_id, key, text):
+        """Set a property of an existing object to already formatted source text"""
+        self.write_property(object_id, key, lambda indent, inline: text)
+
+    def write_property(self, object_id, key, render):
+        """Write the value render(indent, inline) returns for `key`"""
+        properties = self.graph.property_spans(object_id)
+        start, end = self.graph.spans[object_id]
+        inline = b'\n' not in self.graph.text[start:end]
+        if key in properties:
+            _, value_start, value_end, _ = properties[key]
+            indent = self.line_indent(properties[key][0])
+            self.plan.replace(value_start, value_end, render(indent, inline))
+            return
+        # Xcode keeps isa first and the other keys sorted
+        following = [span for name, span in properties.items() if name != 'isa' and name > key]
+        if following:
+            offset = min(span[0] for span in following)
+        else:
+            offset = max(span[3] for span in properties.values())
+        indent = self.line_indent(offset if following else max(span[0] for span in properties.values()))
+        entry = f"{pbx_string(key)} = {render(indent, inline)};"
+        if following:
+            self.plan.insert(offset, entry + (' ' if inline else '\n' + indent))
+        else:
+            self.plan.insert(offset, (' ' if inline else '\n' + indent) + entry)
+
+    def remove_property(self, object_id, key):
+        """Remove a property of an existing object"""
+        properties = self.graph.property_spans(object_id)
+        if key in properties:
+            start, _, _, end = properties[key]
+            self.plan.delete(*self.line_span(start, end))
+
+    def append_items(self, items, values):
+        """Append `values` to a parsed array, one per line"""
+        indent = self.line_indent(items.open) + '\t'
+        self.append_item_texts(items, [self.format_value(value, indent) for value in values])
+
+    def append_item_texts(self, items, texts):
+        """Append already formatted elements to a parsed array, one per line"""
+        text = self.graph.text
+        indent = self.line_indent(items.open) + '\t'
+        entries = [f"{indent}{item_text}," for item_text in texts]
+        line_start = text.rfind(b'\n', 0, items.close) + 1
+        if text[line_start:items.close].strip():
+            # The closing paren shares a line with the last element
+            self.plan.insert(items.close, '\n' + '\n'.join(entries))
+        else:
+            self.plan.insert(line_start, '\n'.join(entries) + '\n')
+
+    def remove_items(self, items, values):
+        """Remove every element of a parsed array that is in `values`"""
+        for item, start, end in self.graph.list_items(items):
+            if item in values:
+                self.plan.delete(*self.line_span(start, end))
+
+    def filter_items(self, items, keep):
+        """Remove the elements of a parsed array for which keep(element) is false
+
+        `keep` sees the elements in order, so it may track what came before.
+        """
+        for item, start, end in self.graph.list_items(items):
+            if not keep(item):
+                self.plan.delete(*self.line_span(start, end))
+
+    def sort_items(self, items, key):
+        """Reorder the elements of a parsed array by key(element), keeping the layout around them
+
+        Returns False if the array was already in order.
+        """
+        text = self.graph.text
+        entries = self.graph.list_items(items)
+        order = sorted(range(len(entries)), key=lambda i: key(entries[i][0]))
+        if order == list(range(len(entries))):
+            return False
+        # Elements move; commas and the whitespace between elements stay in place
+        elements = []
+        commas = []
+        for _, start, end in entries:
+            element = text[start:end]
+            commas.append(element.endswith(b','))
+            elements.append(element[:-1].rstrip() if commas[-1] else element)
+        pieces = []
+        for position, index in enumerate(order):
+            if position:
+                pieces.append(text[entries[position - 1][2]:entries[position][1]])
+            pieces.append(elements[index] + (b',' if commas[position] else b''))
+        self.plan.replace(entries[0][1], entries[-1][2], b''.join(pieces))
+        return True
+
+    def sort_section(self, isa, removed=()):
+        """Order the objects of the `isa` section by ID, dropping those in `removed`
+
+        Returns False if the section was already in order. A section holding
+        anything besides whole-line objects only has `removed` dropped.
+        """
+        graph = self.graph
+        object_ids = graph.ids_by_isa.get(isa, ())
+        kept = [object_id for object_id in object_ids if object_id not in removed]
+        begin, end = graph.section_range(isa)
+        if kept != sorted(kept) and begin >= 0 and end >= 0:
+            body_start = graph.text.find(b'\n', begin) + 1
+            lines = [(object_id, *self.line_span(*graph.spans[object_id])) for object_id in object_ids]
+            # Objects must tile the section exactly for the reorder to lose nothing
+            if all(line[2] == following[1] for line, following in zip(lines, lines[1:])) and \
+                    lines[0][1] == body_start and lines[-1][2] == end:
+                kept_lines = [line for line in lines if line[0] not in removed]
+                self.reorders.append((body_start, end, kept_lines, sorted(kept)))
+                return True
+        for object_id in object_ids:
+            if object_id in removed:
+                self.remove_object(object_id)
+        return False
+
+    def section_insertion(self, isa):
+        """Return (offset, prefix, suffix) for objects added to the `isa` section"""
+        graph = self.graph
+        end = graph.section_end(isa)
+        if end >= 0:
+            return end, '', '\n'
+        # Sections are kept in isa order; open a new one before the next
+        following = [(name, graph.section_range(name)[0]) for name in graph.ids_by_isa if name and name > isa]
+        following = [(name, offset) for name, offset in following if offset >= 0]
+        if following:
+            offset = min(following)[1]
+            return offset, f"/* Begin {isa} section */\n", f"\n/* End {isa} section */\n\n"
+        last_end = max((graph.section_end(name) for name in graph.ids_by_isa if name), default=-1)
+        if last_end < 0:
+            raise ValueError(f"No place to open a {isa} section")
+        offset = graph.text.find(b'\n', last_end) + 1
+        return offset, f"\n/* Begin {isa} section */\n", f"\n/* End {isa} section */\n"
+
+    def serialize(self):
+        """Return the project bytes with every change applied"""
+        text = self.graph.text
+        for body_start, body_end, lines, order in self.reorders:
+            # Each object keeps the edits made inside it, then the section is rebuilt in order
+            edits = self.plan.extract(body_start, body_end)
+            objects = {}
+            index = 0
+            for object_id, line_start, line_end in lines:
+                while index < len(edits) and edits[index][0] < line_start:
+                    index += 1  # inside a dropped object
+                first = index
+                while index < len(edits) and edits[index][0] < line_end and edits[index][1] <= line_end:
+                    index += 1
+                objects[object_id] = EditPlan.splice(text, edits[first:index], line_start, line_end)
+            self.plan.replace(body_start, body_end, b''.join(objects[object_id] for object_id in order))
+        self.reorders = []
+        for isa, entries in self.new_objects.items():
+            offset, prefix, suffix = self.section_insertion(isa)
+            self.plan.insert(offset, prefix + '\n'.join(entries) + suffix)
+        self.new_objects = {}
+        return self.plan.apply(text)
+
+
+class ObjectChunks:
+    """Source span of every object in a project.pbxproj, found without a full parse
+
+    Xcode writes each object at two tabs of indentation, either on one line
+    or with its properties on deeper-indented lines up to a closing `\t\t};`
+    line, and with only section markers between objects.
+    A line scan for that layout is several times faster than tokenizing;
+    files that don't follow it are indexed by the full parser instead.
+    """
+
+    OBJECT = re.compile(rb'\n\t\t([0-9A-Za-z_]+)(?: /\*[^\n]*?\*/)? = \{(?:[^\n]*\};(?=\n)|(?:\n\t\t\t[^\n]*)*\n\t\t\};(?=\n))')
+    OBJECTS_OPEN = re.compile(rb'^\tobjects = \{\n', re.M)
+    GAP = re.compile(rb'(?:\s*/\* (?:Begin|End) \w+ section \*/)*\s*')
+    SECTION_MARKER = re.compile(rb'\n/\* (Begin|End) (\w+) section \*/(?=\n)')
+
+    def __init__(self, text):
+        self.text = text
+        self.spans = {}
+        # Spans of the text around the objects dictionary (archiveVersion, rootObject, ...)
+        self.head = self.tail = None
+        if not self.scan():
+            self.spans = ProjectGraph(text).spans
+            self.head = self.tail = None
+        self._sections = None
+
+    def scan(self):
+        """Index objects by layout; return False if the file doesn't follow it"""
+        text = self.text
+        opening = self.OBJECTS_OPEN.search(text)
+        if opening is None:
+            return False
+        # Nested dictionaries are indented deeper, so this is the objects dictionary's end
+        closing = text.find(b'\n\t};', opening.end())
+        if closing < 0:
+            return False
+        spans = self.spans
+        pos = opening.end() - 1
+        for match in self.OBJECT.finditer(text, pos, closing + 1):
+            start, end = match.span()
+            if start != pos and not self.GAP.fullmatch(text, pos, start):
+                return False
+            # The match starts with the newline and two tabs before the ID
+            spans[match.group(1).decode('ascii')] = (start + 3, end)
+            pos = end
+        if not self.GAP.fullmatch(text, pos, closing):
+            return False
+        self.head = (0, opening.end())
+        self.tail = (closing + 1, len(text))
+        return True
+
+    def around(self):
+        """Return the bytes before and after the objects dictionary, or None if unknown"""
+        if self.head is None:
+            return None
+        return self.text[self.head[0]:self.head[1]], self.text[self.tail[0]:self.tail[1]]
+
+    def chunk(self, object_id):
+        """Return the source bytes of an object, or None if it doesn't exist"""
+        span = self.spans.get(object_id)
+        return None if span is None else self.text[span[0]:span[1]]
+
+    def sections(self):
+        """Return {isa: (Begin offset, End offset)} of every section marker pair"""
+        if self._sections is None:
+            self._sections = {}
+            for match in self.SECTION_MARKER.finditer(self.text):
+                isa = match.group(2).decode('ascii')
+                begin, end = self._sections.get(isa, (-1, -1))
+                if match.group(1) == b'Begin':
+                    begin = match.start() + 1
+                else:
+                    end = match.start() + 1
+                self._sections[isa] = (begin, end)
+        return self._sections
+
+
+class ProjectMerger:
+    """Three-way merge of project.pbxproj at the object-graph level
+
+    Objects identical on two sides are resolved from their raw text alone,
+    so only objects changed on both sides are parsed. For those, each
+    property is merged on its own: arrays of IDs and names (children, files,
+    buildPhases, ...) are unioned, nested dictionaries are merged key by
+    key, and only a property changed differently on both sides conflicts.
+    The result is our file with the merged changes applied in place.
+
+    Install as a git merge driver with
+
+        git config merge.pbxproj.driver "python3 add_files_simple.py --merge-driver %O %A %B"
+        echo '*.pbxproj merge=pbxproj' >> .gitattributes
+    """
+
+    CHUNK_HEAD = b"{\n\tobjects = {\n\t\t"
+    CHUNK_TAIL = b"\n\t};\n}\n"
+
+    def __init__(self, base_text, ours_text, theirs_text):
+        self.base = ObjectChunks(base_text)
+        self.ours = ObjectChunks(ours_text)
+        self.theirs = ObjectChunks(theirs_text)
+        self.plan = EditPlan()
+        self.conflicts = []
+        self.merged = 0
+
+    @staticmethod
+    def parse_chunk(chunk):
+        """Parse an object's source bytes into its dictionary"""
+        return next(iter(PbxprojParser(b'{' + chunk + b'}').parse().values()))
+
+    def chunk_graph(self, chunk):
+        """Return a ProjectGraph over a document holding just `chunk`"""
+        return ProjectGraph(self.CHUNK_HEAD + chunk + self.CHUNK_TAIL)
+
+    def same(self, first, second):
+        """Return True if two object chunks are equal, ignoring formatting"""
+        return first == second or self.parse_chunk(first) == self.parse_chunk(second)
+
+    @staticmethod
+    def merge_lists(base, ours, theirs):
+        """Return our array with their additions and removals, or None if it isn't a plain list"""
+        if not all(isinstance(item, str) for item in (*base, *ours, *theirs)):
+            return None
+        removed = set(base).difference(theirs)
+        ours_set = set(ours)
+        base_set = set(base)
+        return ([item for item in ours if item not in removed] +
+                [item for item in theirs if item not in base_set and item not in ours_set])
+
+    def merge_values(self, base, ours, theirs):
+        """Return (merged value, True) or (our value, False) on a conflict"""
+        if ours == theirs or theirs == base:
+            return ours, True
+        if ours == base:
+            return theirs, True
+        if isinstance(ours, list) and isinstance(theirs, list) and isinstance(base or [], list):
+            merged = self.merge_lists(base or [], ours, theirs)
+            return (ours, False) if merged is None else (PbxList(merged), True)
+        if isinstance(ours, dict) and isinstance(theirs, dict) and isinstance(base or {}, dict):
+            base = base or {}
+            merged = {}
+            for key in {**ours, **theirs}:
+                value, ok = self.merge_values(base.get(key), ours.get(key), theirs.get(key))
+                if not ok:
+                    return ours, False
+                if value is not None:
+                    merged[key] = value
+            return merged, True
+        return ours, False
+
+    def merge_object(self, object_id, base_chunk, ours_chunk, theirs_chunk):
+        """Return our chunk with their property changes merged in, or None and the conflicting keys"""
+        base = self.parse_chunk(base_chunk) if base_chunk else {}
+        ours_graph = self.chunk_graph(ours_chunk)
+        theirs_graph = self.chunk_graph(theirs_chunk)
+        ours = ours_graph.objects[object_id]
+        theirs = theirs_graph.objects[object_id]
+        theirs_spans = theirs_graph.property_spans(object_id)
+        editor = ProjectEditor(ours_graph)
+        conflicts = []
+        for key in {**ours, **theirs}:
+            base_value, ours_value, theirs_value = base.get(key), ours.get(key), theirs.get(key)
+            if ours_value == theirs_value or theirs_value == base_value:
+                continue
+            if ours_value == base_value:
+                if theirs_value is None:
+                    editor.remove_property(object_id, key)
+                else:
+                    _, value_start, value_end, _ = theirs_spans[key]
+                    editor.set_property_text(object_id, key, theirs_graph.text[value_start:value_end].decode('utf-8'))
+                continue
+            if isinstance(ours_value, PbxList) and isinstance(theirs_value, PbxList) and isinstance(base_value or [], list):
+                merged = self.merge_lists(base_value or [], ours_value, theirs_value)
+                if merged is not None:
+                    # Keep their comments on the elements they added
+                    added = set(merged).difference(ours_value)
+                    editor.remove_items(ours_value, set(ours_value).difference(merged))
+                    editor.append_item_texts(ours_value, [
+                        theirs_graph.text[start:end].rstrip(b',').rstrip().decode('utf-8')
+                        for item, start, end in theirs_graph.list_items(theirs_value) if item in added])
+                    continue
+            merged, ok = self.merge_values(base_value, ours_value, theirs_value)
+            if ok:
+                editor.set_property(object_id, key, merged)
+            else:
+                conflicts.append(key)
+        if conflicts:
+            return None, conflicts
+        merged_text = editor.serialize()
+        return merged_text[len(self.CHUNK_HEAD):len(merged_text) - len(self.CHUNK_TAIL)], []
+
+    def line_span(self, start, end):
+        """Return [start, end) of the whole lines of an object in our file"""
+        text = self.ours.text
+        return text.rfind(b'\n', 0, start) + 1, text.find(b'\n', end) + 1
+
+    def conflict(self, object_id, ours_chunk, theirs_chunk, keys):
+        """Record a conflict and write both versions of the object with markers"""
+        self.conflicts.append((object_id, keys))
+        lines = [b"<<<<<<< ours\n"]
+        if ours_chunk:
+            lines.append(b"\t\t" + ours_chunk + b"\n")
+        lines.append(b"=======\n")
+        if theirs_chunk:
+            lines.append(b"\t\t" + theirs_chunk + b"\n")
+        lines.append(b">>>>>>> theirs\n")
+        if ours_chunk:
+            self.plan.replace(*self.line_span(*self.ours.spans[object_id]), b''.join(lines))
+        else:
+            self.add_object(theirs_chunk, b''.join(lines))
+
+    def add_object(self, theirs_chunk, text):
+        """Queue `text` (bytes) at the end of the section of the object in `theirs_chunk`"""
+        isa = self.parse_chunk(theirs_chunk).get('isa')
+        sections = self.ours.sections()
+        if isa in sections and sections[isa][1] >= 0:
+            self.plan.insert(sections[isa][1], text)
+            return
+        # Open the section before the next one in isa order, or after the last
+        following = sorted((name, begin) for name, (begin, _) in sections.items() if name > isa and begin >= 0)
+        if following:
+            self.plan.insert(following[0][1], f"/* Begin {isa} section */\n".encode() + text +
+                             f"/* End {isa} section */\n\n".encode())
+        else:
+            last_end = max(end for _, end in sections.values())
+            offset = self.ours.text.find(b'\n', last_end) + 1
+            self.plan.insert(offset, f"\n/* Begin {isa} section */\n".encode() + text +
+                             f"/* End {isa} section */\n".encode())
+
+    def merge(self):
+        """Return the merged bytes of our file; conflicts are left in self.conflicts"""
+        base, ours, theirs = self.base, self.ours, self.theirs
+        object_ids = list(theirs.spans) + [object_id for object_id in base.spans if object_id not in theirs.spans]
+        theirs_spans, ours_spans = theirs.spans, ours.spans
+        for object_id in object_ids:
+            # Most objects are untouched on both sides; compare them without slicing helpers
+            theirs_span, ours_span = theirs_spans.get(object_id), ours_spans.get(object_id)
+            if (theirs_span is not None and ours_span is not None
+                    and theirs_span[1] - theirs_span[0] == ours_span[1] - ours_span[0]
+                    and theirs.text[theirs_span[0]:theirs_span[1]] == ours.text[ours_span[0]:ours_span[1]]):
+                continue
+            theirs_chunk = theirs.chunk(object_id)
+            ours_chunk = ours.chunk(object_id)
+            if theirs_chunk == ours_chunk:
+                continue
+            base_chunk = base.chunk(object_id)
+            if theirs_chunk == base_chunk:
+                continue
+            if ours_chunk == base_chunk:
+                # Only they changed it: take their version
+                self.merged += 1
+                if theirs_chunk is None:
+                    self.plan.delete(*self.line_span(*ours.spans[object_id]))
+                elif ours_chunk is None:
+                    self.add_object(theirs_chunk, b"\t\t" + theirs_chunk + b"\n")
+                else:
+                    self.plan.replace(*ours.spans[object_id], theirs_chunk)
+                continue
+            if ours_chunk is None or theirs_chunk is None:
+                # Deleted on one side; a conflict unless the other side only reformatted it
+                if ours_chunk is None and self.same(base_chunk, theirs_chunk):
+                    continue
+                if theirs_chunk is None and self.same(base_chunk, ours_chunk):
+                    self.merged += 1
+                    self.plan.delete(*self.line_span(*ours.spans[object_id]))
+                    continue
+                self.conflict(object_id, ours_chunk, theirs_chunk, ['(deleted)'])
+                continue
+            merged_chunk, keys = self.merge_object(object_id, base_chunk, ours_chunk, theirs_chunk)
+            if merged_chunk is None:
+                self.conflict(object_id, ours_chunk, theirs_chunk, keys)
+            else:
+                self.merged += 1
+                self.plan.replace(*ours.spans[object_id], merged_chunk)
+
+        self.merge_around()
+        return self.plan.apply(ours.text)
+
+    def merge_around(self):
+        """Merge the top-level keys outside the objects dictionary"""
+        base, ours, theirs = self.base.around(), self.ours.around(), self.theirs.around()
+        if None in (base, ours, theirs):
+            return
+        for base_text, ours_text, theirs_text, span in zip(base, ours, theirs, (self.ours.head, self.ours.tail)):
+            if theirs_text in (base_text, ours_text):
+                continue
+            if ours_text == base_text:
+                self.plan.replace(*span, theirs_text)
+                continue
+            self.conflicts.append(('(root)', ['(top-level keys)']))
+            self.plan.replace(*span, b"<<<<<<< ours\n" + ours_text + b"=======\n" + theirs_text + b">>>>>>> theirs\n")
+
+
+def replace_file(path, data):
+    """Replace `path` with `data` through a uniquely named temporary file next to it"""
+    directory, name = os.path.split(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile('wb', dir=directory, prefix=f'.{name}.', delete=False) as f:
+        try:
+            f.write(data)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+
+
+class ScanCache:
+    """Persistent record of directory listings under the source root
+
+    A cached listing is reused while the directory's mtime and inode are
+    unchanged, so a warm run stats every directory but only re-lists the
+    ones that gained, lost or renamed entries since the last invocation.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.dirs = {}
+        self.visited = {}
+        self.dirty = False
+        self.relisted = 0
+
+    def load(self):
+        """Load the cache file, starting empty if it is missing or stale"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == self.VERSION:
+            self.dirs = data.get('dirs', {})
+
+    def save(self):
+        """Write back the listings seen during this run and start a new one"""
+        if not self.visited:
+            return
+        if self.dirty or len(self.visited) != len(self.dirs):
+            data = json.dumps({'version': self.VERSION, 'dirs': self.visited}, separators=(',', ':'))
+            replace_file(self.path, data.encode())
+        self.dirs, self.visited = self.visited, {}
+        self.dirty = False
+        self.relisted = 0
+
+    def listing(self, dir_path, stat=None):
+        """Return (subdirectories, files) of `dir_path`, re-listing only if it changed"""
+        if stat is None:
+            stat = os.stat(dir_path)
+        entry = self.dirs.get(dir_path)
+        if entry is None or entry['mtime'] != stat.st_mtime_ns or entry['inode'] != stat.st_ino or 'files' not in entry:
+            entry = {'mtime': stat.st_mtime_ns, 'inode': stat.st_ino}
+            entry['dirs'], entry['files'] = list_directory(dir_path)
+            self.dirty = True
+            self.relisted += 1
+        self.visited[dir_path] = entry
+        return entry['dirs'], entry['files']
+
+    def touch(self, dir_path, stat):
+        """Record a directory that was visited without being listed"""
+        entry = self.dirs.get(dir_path)
+        if entry is None or entry['mtime'] != stat.st_mtime_ns or entry['inode'] != stat.st_ino:
+            entry = {'mtime': stat.st_mtime_ns, 'inode': stat.st_ino}
+            self.dirty = True
+        self.visited[dir_path] = entry
+
+
+class ProjectSnapshot:
+    """Binary snapshot of a parsed project, reused while the project file is unchanged
+
+    A fixed-size header (format version, the project's size, mtime and
+    SHA-256) is followed by the marshaled root dictionary and object spans.
+    Arrays are stored as (open, close, items) tuples so their source offsets
+    survive; the parser never produces tuples itself.
+    """
+
+    VERSION = 1
+    HEADER = struct.Struct('>4sIQQ32s')
+    MAGIC = b'PBXS'
+
+    def __init__(self, path):
+        self.path = path
+
+    @staticmethod
+    def key(stat, data):
+        """Return the (size, mtime, digest) key of the project bytes `data`"""
+        return len(data), stat.st_mtime_ns, hashlib.sha256(data).digest()
+
+    @classmethod
+    def encode(cls, value):
+        if isinstance(value, dict):
+            return {key: cls.encode(item) for key, item in value.items()}
+        if isinstance(value, PbxList):
+            return (value.open, value.close, [cls.encode(item) for item in value])
+        return value
+
+    @classmethod
+    def decode(cls, container):
+        """Turn stored arrays back into PbxLists, in place"""
+        for key, item in (container.items() if type(container) is dict else enumerate(container)):
+            if type(item) is tuple:
+                result = PbxList(item[2])
+                result.open, result.close = item[0], item[1]
+                cls.decode(result)
+                container[key] = result
+            elif type(item) is dict:
+                cls.decode(item)
+
+    def load(self, key):
+        """Return (root, spans) saved for `key`, or None"""
+        try:
+            with open(self.path, 'rb') as f:
+                if f.read(self.HEADER.size) != self.HEADER.pack(self.MAGIC, self.VERSION, *key):
+                    return None
+                root, spans = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        self.decode(root)
+        return root, spans
+
+    def save(self, key, graph):
+        """Write a snapshot of `graph` for `key`"""
+        replace_file(self.path, self.HEADER.pack(self.MAGIC, self.VERSION, *key) +
+                     marshal.dumps((self.encode(graph.root), graph.spans)))
+
+
+def list_directory(dir_path):
+    """Return sorted (subdirectories, files) of `dir_path`"""
+    dirs, files = [], []
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            (dirs if entry.is_dir() else files).append(entry.name)
+    dirs.sort()
+    files.sort()
+    return dirs, files
+
+
+class IgnoreRules:
+    """Ordered gitignore-style patterns where the last matching pattern wins"""
+
+    def __init__(self, patterns=()):
+        self.rules = []
+        for pattern in patterns:
+            self.add_pattern(pattern)
+
+    def add_pattern(self, pattern, base=''):
+        """Add one pattern that applies to paths below `base`"""
+        pattern = pattern.rstrip()
+        if not pattern or pattern.startswith('#'):
+            return
+        negate = pattern.startswith('!')
+        if negate:
+            pattern = pattern[1:]
+        dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        anchored = '/' in pattern
+        regex = re.compile(self.translate(pattern.lstrip('/')))
+        self.rules.append((regex, negate, dir_only, anchored, base))
+
+    def add_file(self, path, base=''):
+        """Add every pattern of an ignore file"""
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    self.add_pattern(line, base)
+        except OSError:
+            pass
+
+    @staticmethod
+    def translate(pattern):
+        """Translate a gitignore glob into a regex matched against whole paths"""
+        parts = []
+        i = 0
+        while i < len(pattern):
+            if pattern.startswith('**/', i):
+                parts.append('(?:.*/)?')
+                i += 3
+            elif pattern.startswith('/**', i) and i + 3 == len(pattern):
+                parts.append('/.*')
+                i += 3
+            elif pattern[i] == '*':
+                parts.append('[^/]*')
+                i += 1
+            elif pattern[i] == '?':
+                parts.append('[^/]')
+                i += 1
+            elif pattern[i] == '[' and ']' in pattern[i + 2:]:
+                end = pattern.index(']', i + 2)
+                parts.append('[' + pattern[i + 1:end].replace('!', '^', 1) + ']')
+                i = end + 1
+            else:
+                parts.append(re.escape(pattern[i]))
+                i += 1
+        return ''.join(parts)
+
+    def ignored(self, path, is_dir):
+        """Return True if `path` (slash-separated) is excluded"""
+        name = path.rpartition('/')[2]
+        result = False
+        for regex, negate, dir_only, anchored, base in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not path.startswith(base):
+                    continue
+                relative = path[len(base):]
+            else:
+                relative = path
+            if regex.fullmatch(relative if anchored else name):
+                result = not negate
+        return result
+
+
+class SourceWalker:
+    """os.scandir-based walk of the source root with directory-level pruning
+
+    Excluded directories are never entered, .gitignore files are honored as
+    they are found, and every directory is stat'ed exactly once; its
+    (device, inode) pair is remembered so symlink loops and duplicate
+    mounts are visited only once. Package directories such as asset
+    catalogs are yielded like files and never entered.
+    """
+
+    DEFAULT_EXCLUDES = (
+        '.git/', '.build/', '.swiftpm/', 'build/', 'DerivedData/', 'xcuserdata/',
+        'Pods/', 'Carthage/', 'Vendor/', 'vendor/',
+        '*.xcodeproj/', '*.xcworkspace/', '*.framework/', '*.bundle/',
+    )
+
+    def __init__(self, root, excludes=DEFAULT_EXCLUDES, use_gitignore=True, cache=None, repo_root='.'):
+        self.root = root
+        self.cache = cache
+        self.excludes = IgnoreRules(excludes)
+        self._pruned_dirs = {}
+        self.directories = []
+        self.listed = {}
+        self.gitignore = IgnoreRules() if use_gitignore else None
+        prefix = os.path.relpath(root, repo_root).replace(os.sep, '/')
+        self.prefix = '' if prefix == '.' else prefix + '/'
+        if self.gitignore is not None:
+            self.gitignore.add_file(os.path.join(repo_root, '.gitignore'))
+            self.gitignore.add_file(os.path.join(repo_root, '.git', 'info', 'exclude'))
+
+    def ignored(self, relative_path, is_dir):
+        """Return True if a path relative to the source root is pruned"""
+        if self.excludes.ignored(relative_path, is_dir):
+            return True
+        return self.gitignore is not None and self.gitignore.ignored(self.prefix + relative_path, is_dir)
+
+    def excluded(self, relative_path):
+        """Return True if a file or any directory above it matches the exclude list"""
+        directory, _, _ = relative_path.rpartition('/')
+        if directory:
+            pruned = self._pruned_dirs.get(directory)
+            if pruned is None:
+                pruned = self.excluded(directory) or self.excludes.ignored(directory, True)
+                self._pruned_dirs[directory] = pruned
+            if pruned:
+                return True
+        return self.excludes.ignored(relative_path, False)
+
+    @staticmethod
+    def package_root(relative_path):
+        """Return `relative_path` cut after its first package directory, if any"""
+        if '.' not in relative_path:
+            return relative_path
+        parts = relative_path.split('/')
+        for i, part in enumerate(parts[:-1]):
+            if part.endswith(PACKAGE_SUFFIXES):
+                return '/'.join(parts[:i + 1])
+        return relative_path
+
+    def walk(self, known_dirs=None, since=None):
+        """Yield slash-separated paths relative to the source root of every kept file
+
+        With `known_dirs` ({directory: subdirectories} of the files already
+        known, e.g. from .git/index), a known directory not modified since
+        the `since` timestamp (ns) is not listed: nothing was added to or
+        removed from it, so only its known subdirectories are entered. The
+        names in every listed directory are kept in `listed`.
+        """
+        root_stat = os.stat(self.root)
+        seen = {(root_stat.st_dev, root_stat.st_ino)}
+        pending = [('', root_stat)]
+        while pending:
+            relative_dir, stat = pending.pop()
+            self.directories.append(relative_dir)
+            dir_path = os.path.join(self.root, relative_dir) if relative_dir else self.root
+            unchanged = known_dirs is not None and relative_dir in known_dirs and stat.st_mtime_ns < since
+            if unchanged:
+                dirs, files = sorted(known_dirs[relative_dir]), []
+                if self.cache is not None:
+                    self.cache.touch(dir_path, stat)
+            elif self.cache is not None:
+                dirs, files = self.cache.listing(dir_path, stat)
+            else:
+                dirs, files = list_directory(dir_path)
+            if known_dirs is not None and not unchanged:
+                self.listed[relative_dir] = set(files).union(dirs)
+            base = relative_dir + '/' if relative_dir else ''
+            if self.gitignore is not None and '.gitignore' in files:
+                self.gitignore.add_file(os.path.join(dir_path, '.gitignore'), self.prefix + base)
+
+            for name in files:
+                if not self.ignored(base + name, False):
+                    yield base + name
+
+            for name in reversed(dirs):
+                relative_path = base + name
+                if self.ignored(relative_path, True):
+                    continue
+                if name.endswith(PACKAGE_SUFFIXES):
+                    yield relative_path
+                    continue
+                try:
+                    sub_stat = os.stat(os.path.join(self.root, relative_path))
+                except OSError:
+                    continue
+                key = (sub_stat.st_dev, sub_stat.st_ino)
+                if key in seen:
+                    continue
+                seen.add(key)
+                pending.append((relative_path, sub_stat))
+
+
+class GitIndexError(Exception):
+    """Raised when .git/index cannot be read"""
+
+
+class GitIndex:
+    """Sequential reader for the entries of a .git/index file (versions 2 to 4)
+
+    Paths come straight from the index, so listing tracked files costs one
+    read of a single file: no git subprocess and no filesystem walk.
+    """
+
+    ENTRY_FIXED_SIZE = 40
+    GITLINK_MODE = 0o160000
+
+    def __init__(self, git_dir):
+        self.path = os.path.join(git_dir, 'index')
+        self.hash_size = 32 if self.object_format(git_dir) == 'sha256' else 20
+
+    @staticmethod
+    def object_format(git_dir):
+        """Return the repository's object format from .git/config"""
+        try:
+            with open(os.path.join(git_dir, 'config'), 'r') as f:
+                match = re.search(r'^\s*objectformat\s*=\s*(\S+)', f.read(), re.MULTILINE | re.IGNORECASE)
+        except OSError:
+            return 'sha1'
+        return match.group(1).lower() if match else 'sha1'
+
+    @staticmethod
+    def find(start='.'):
+        """Return (work tree, git dir) of the repository containing `start`"""
+        work_tree = os.path.abspath(start)
+        while True:
+            dot_git = os.path.join(work_tree, '.git')
+            if os.path.isdir(dot_git):
+                return work_tree, dot_git
+            if os.path.isfile(dot_git):
+                # Linked worktrees and submodules point at their git dir
+                with open(dot_git, 'r') as f:
+                    content = f.read().strip()
+                if content.startswith('gitdir:'):
+                    return work_tree, os.path.join(work_tree, content[len('gitdir:'):].strip())
+            parent = os.path.dirname(work_tree)
+            if parent == work_tree:
+                raise GitIndexError(f"No git repository found above {start}")
+            work_tree = parent
+
+    @staticmethod
+    def read_varint(data, pos):
+        """Decode the offset varint used by index version 4"""
+        byte = data[pos]
+        pos += 1
+        value = byte & 0x7f
+        while byte & 0x80:
+            byte = data[pos]
+            pos += 1
+            value = ((value + 1) << 7) | (byte & 0x7f)
+        return value, pos
+
+    def paths(self, prefix=''):
+        """Yield tracked paths under `prefix` (with the prefix removed), in index order"""
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        if len(data) < 12:
+            raise GitIndexError(f"{self.path} is truncated")
+        signature, version, count = struct.unpack_from('>4sLL', data, 0)
+        if signature != b'DIRC' or version not in (2, 3, 4):
+            raise GitIndexError(f"Unsupported index format in {self.path}")
+
+        prefix_bytes = prefix.encode('utf-8')
+        flags_offset = self.ENTRY_FIXED_SIZE + self.hash_size
+        previous = b''
+        pos = 12
+        for _ in range(count):
+            mode, = struct.unpack_from('>L', data, pos + 24)
+            flags, = struct.unpack_from('>H', data, pos + flags_offset)
+            header = flags_offset + 2
+            skip_worktree = False
+            if version >= 3 and flags & 0x4000:
+                extended_flags, = struct.unpack_from('>H', data, pos + header)
+                skip_worktree = bool(extended_flags & 0x4000)
+                header += 2
+            if version == 4:
+                strip, start = self.read_varint(data, pos + header)
+                end = data.index(b'\0', start)
+                path = previous[:len(previous) - strip] + data[start:end]
+                pos = end + 1
+            else:
+                start = pos + header
+                end = data.index(b'\0', start)
+                path = data[start:end]
+                # Entries are NUL-padded to a multiple of eight bytes
+                pos += (header + len(path) + 8) & ~7
+            previous = path
+
+            if not path.startswith(prefix_bytes):
+                if path > prefix_bytes:
+                    # Entries are sorted, so nothing later can match
+                    break
+                continue
+            if flags & 0x3000 or skip_worktree or mode == self.GITLINK_MODE:
+                # Unmerged stages, sparse-checkout entries and submodules
+                continue
+            yield path[len(prefix_bytes):].decode('utf-8', 'surrogateescape')
+
+
+class ObjectIdAllocator:
+    """Hands out 24-character object IDs that never collide with existing ones
+
+    With a key (for example the file path an object describes) the ID is
+    derived from a hash of that key, so the same change produces the same
+    IDs on every machine. Collisions with IDs already in the project or
+    handed out earlier are resolved by rehashing with a counter.
+    """
+
+    def __init__(self, existing=(), deterministic=True):
+        self.existing = existing
+        self.deterministic = deterministic
+        self.allocated = set()
+
+    def is_free(self, candidate):
+        return candidate not in self.existing and candidate not in self.allocated
+
+    def allocate(self, key=None):
+        """Return a fresh ID, derived from `key` when allocating deterministically"""
+        attempt = 0
+        while True:
+            if self.deterministic and key is not None:
+                seed = key if attempt == 0 else f"{key}#{attempt}"
+                candidate = hashlib.sha256(seed.encode('utf-8')).hexdigest()[:24].upper()
+            else:
+                candidate = uuid.uuid4().hex[:24].upper()
+            if self.is_free(candidate):
+                self.allocated.add(candidate)
+                return candidate
+            attempt += 1
+
+
+class TargetRules:
+    """Decides which native targets build each new source file
+
+    Rules are read from a JSON file mapping target names to gitignore-style
+    globs over project-relative paths, e.g.
+
+        {"VoiceControl": ["VoiceControl/**", "!*Tests.swift"],
+         "VoiceControlTests": ["*Tests.swift"]}
+
+    and a file joins every target whose patterns include it. Without a rules
+    file (or for targets it doesn't mention), naming conventions apply:
+    files named *Tests/*Test or under a *Tests directory go to the test
+    target named by one of their directories, else the first test bundle of
+    the matching kind. Other files go to the non-test target named by one
+    of their directories, else to the targets building the files of the
+    nearest directory that has any, else to the first app target.
+    """
+
+    DEFAULT_PATH = "add_files_targets.json"
+    UNIT_TEST_TYPE = 'com.apple.product-type.bundle.unit-test'
+    UI_TEST_TYPE = 'com.apple.product-type.bundle.ui-testing'
+    APPLICATION_TYPE = 'com.apple.product-type.application'
+
+    def __init__(self, graph, rules=None):
+        self.graph = graph
+        self._dir_targets = None
+        self.targets = []
+        for target_id, target in graph.objects_of_isa('PBXNativeTarget'):
+            self.targets.append((target_id, target.get('name', ''), target.get('productType', '')))
+        self.rules = {}
+        names = {name: target_id for target_id, name, _ in self.targets}
+        for name, patterns in (rules or {}).items():
+            if name not in names:
+                print(f"Warning: no native target named {name!r}; ignoring its rules")
+                continue
+            self.rules[names[name]] = IgnoreRules(patterns)
+
+    @staticmethod
+    def load(path):
+        """Return the rules in `path`, or None if there is no rules file"""
+        if not path:
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def targets_for(self, path):
+        """Return the IDs of the targets that should build `path`"""
+        if self.rules:
+            matched = [target_id for target_id, rules in self.rules.items() if rules.ignored(path, False)]
+            if matched:
+                return matched
+        return self.convention_targets(path)
+
+    def dir_targets(self):
+        """Return {directory: IDs of the targets building a file in it}, in target order"""
+        if self._dir_targets is None:
+            graph = self.graph
+            paths = {ref: path for path, ref in graph.file_paths().items()}
+            paths.update((ref, path) for path, ref in graph.variant_groups().items())
+            self._dir_targets = {}
+            for target_id, _, _ in self.targets:
+                for phase_id in graph.objects[target_id].get('buildPhases', ()):
+                    for build_id in graph.objects.get(phase_id, {}).get('files', ()):
+                        path = paths.get(graph.objects.get(build_id, {}).get('fileRef'))
+                        if path is None:
+                            continue
+                        targets = self._dir_targets.setdefault(posixpath.dirname(path), [])
+                        if target_id not in targets:
+                            targets.append(target_id)
+        return self._dir_targets
+
+    def convention_targets(self, path):
+        """Pick targets for `path` by naming convention"""
+        dirs = path.split('/')[:-1]
+        stem = posixpath.splitext(posixpath.basename(path))[0]
+        if any(name.endswith('UITests') for name in dirs) or stem.endswith(('UITests', 'UITest')):
+            kinds = (self.UI_TEST_TYPE,)
+        elif any(name.endswith('Tests') for name in dirs) or stem.endswith(('Tests', 'Test')):
+            kinds = (self.UNIT_TEST_TYPE,)
+        else:
+            kinds = None
+
+        if kinds is None:
+            candidates = [(target_id, name, product_type) for target_id, name, product_type in self.targets
+                          if product_type not in (self.UNIT_TEST_TYPE, self.UI_TEST_TYPE)]
+            for target_id, name, _ in candidates:
+                if name in dirs:
+                    return [target_id]
+            # Follow the files already in the nearest directory that has any
+            allowed = {target_id for target_id, _, _ in candidates}
+            dir_targets = self.dir_targets()
+            directory = posixpath.dirname(path)
+            while True:
+                siblings = [target_id for target_id in dir_targets.get(directory, ()) if target_id in allowed]
+                if siblings:
+                    return siblings
+                if not directory:
+                    break
+                directory = posixpath.dirname(directory)
+            apps = [target_id for target_id, _, product_type in candidates if product_type == self.APPLICATION_TYPE]
+            return (apps or [target_id for target_id, _, _ in candidates])[:1]
+        candidates = [(target_id, name) for target_id, name, product_type in self.targets if product_type in kinds]
+        for target_id, name in candidates:
+            if name in dirs:
+                return [target_id]
+        return [target_id for target_id, _ in candidates[:1]]
+
+
+class PhaseProfiler:
+    """Records wall time, CPU time and (optionally) peak memory for each updater phase
+
+    tracemalloc slows allocation-heavy phases far more than others, so
+    memory is only traced when asked for; timings taken with it on don't
+    compare across phases.
+    """
+
+    def __init__(self, pstats_path=None, trace_memory=False):
+        self.phases = []
+        self.pstats_path = pstats_path
+        self.trace_memory = trace_memory
+        self.profile = cProfile.Profile() if pstats_path else None
+
+    def start(self):
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.profile is not None:
+            self.profile.enable()
+
+    def stop(self):
+        if self.profile is not None:
+            self.profile.disable()
+            self.profile.dump_stats(self.pstats_path)
+        if self.trace_memory:
+            tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Measure the enclosed block as phase `name`"""
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            base_memory = tracemalloc.get_traced_memory()[0]
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            phase = {'phase': name, 'wall_seconds': wall, 'cpu_seconds': cpu}
+            if self.trace_memory:
+                phase['peak_memory_bytes'] = max(tracemalloc.get_traced_memory()[1] - base_memory, 0)
+            self.phases.append(phase)
+
+    def report(self, counters):
+        """Return the recorded phases and `counters` as a JSON-ready dict"""
+        return {
+            'phases': self.phases,
+            'total_wall_seconds': sum(phase['wall_seconds'] for phase in self.phases),
+            'total_cpu_seconds': sum(phase['cpu_seconds'] for phase in self.phases),
+            'counters': counters,
+        }
+
+
+def iter_objects(path, isa=None):
+    """Yield (id, object) pairs of a project.pbxproj lazily, in file order
+
+    `isa` limits the objects to one isa or a collection of them. Their
+    sections are found by their Begin/End markers and only those are
+    tokenized, so reading stops once the last requested section has been
+    consumed. Files without section markers are streamed in full.
+    """
+    wanted = None if isa is None else {isa} if isinstance(isa, str) else set(isa)
+    with open(path, 'rb') as f:
+        text = map_file(f)
+    if wanted is not None and text.find(b'/* Begin ') >= 0:
+        ranges = []
+        for name in wanted:
+            begin = text.find(f'/* Begin {name} section */'.encode())
+            if begin >= 0:
+                end = text.find(f'/* End {name} section */'.encode(), begin)
+                ranges.append((begin, len(text) if end < 0 else end))
+        for begin, end in sorted(ranges):
+            for object_id, obj in PbxprojParser(text, begin, end).entries():
+                if obj.get('isa') in wanted:
+                    yield object_id, obj
+        return
+
+    for object_id, obj in PbxprojParser(text).objects():
+        if wanted is None or obj.get('isa') in wanted:
+            yield object_id, obj
+
 
 class XcodeProjectUpdater:
-    def __init__(self, project_path="VoiceControl.xcodeproj/project.pbxproj"):
+    def __init__(self, project_path="VoiceControl.xcodeproj/project.pbxproj",
+                 scan_cache_path=".add_files_scan_cache.json", excludes=SourceWalker.DEFAULT_EXCLUDES,
+                 discovery="walk", include_untracked=True, stamp_path=".add_files.stamp", fsync=False,
+                 deterministic_ids=True, sync=False, target_rules_path=TargetRules.DEFAULT_PATH,
+                 normalize=False, snapshot_path=".add_files_project_cache.bin", source_roots=("VoiceControl",)):
         self.project_path = project_path
-        self.project_content = ""
+        self.source_roots = source_roots
+        self.scan_cache_path = scan_cache_path
+        self.excludes = excludes
+        self.discovery = discovery
+        self.include_untracked = include_untracked
+        self.stamp_path = stamp_path
+        self.fsync = fsync
+        self.deterministic_ids = deterministic_ids
+        self.sync = sync
+        self.target_rules_path = target_rules_path
+        self.normalize = normalize
+        self.snapshot_path = snapshot_path
+        self.project_stat = None
+        self.id_allocator = None
+        self.project_content = b""
+        self.original_content = b""
+        self.graph = None
+        self.scan_cache = None
+        self.source_dirs = []
+        self.profiler = None
+        self.stats = {}
         self.files_to_add = []
+        self.files_to_remove = []
         self.existing_files = set()
         
-    def generate_uuid(self):
-        """Generate a 24-character hex UUID for Xcode"""
-        return uuid.uuid4().hex[:24].upper()
+    def generate_uuid(self, key=None):
+        """Generate a 24-character hex object ID that is unused in the project"""
+        return self.id_allocator.allocate(key)
     
     def read_project(self):
-        """Read the current project file"""
-        with open(self.project_path, 'r') as f:
-            self.project_content = f.read()
+        """Map the current project file; it is parsed as UTF-8 bytes, never decoded whole"""
+        with open(self.project_path, 'rb') as f:
+            self.project_content = map_file(f)
+            self.project_stat = os.fstat(f.fileno())
+        self.original_content = self.project_content
+        self.stats['bytes_read'] = len(self.project_content)
+
+    def parse_project(self):
+        """Parse the project file into an object graph, reusing the snapshot of an unchanged file"""
+        # Only bytes as read from disk match a snapshot key
+        snapshot = parsed = None
+        if self.snapshot_path and self.project_stat is not None and self.project_content is self.original_content:
+            snapshot = ProjectSnapshot(self.snapshot_path)
+            key = ProjectSnapshot.key(self.project_stat, self.project_content)
+            parsed = snapshot.load(key)
+            self.stats['snapshot'] = 'hit' if parsed is not None else 'miss'
+
+        if parsed is not None:
+            self.graph = ProjectGraph(self.project_content, *parsed)
+        else:
+            self.graph = ProjectGraph(self.project_content)
+            if snapshot is not None:
+                try:
+                    snapshot.save(key, self.graph)
+                except OSError as e:
+                    print(f"Warning: could not save the project snapshot ({e})")
+        self.attach_graph(self.graph)
+
+    def attach_graph(self, graph):
+        """Use `graph` for this update, with a fresh ID allocator over its objects"""
+        self.graph = graph
+        self.id_allocator = ObjectIdAllocator(graph.objects, deterministic=self.deterministic_ids)
+        self.stats['objects'] = len(graph.objects)
             
     def extract_existing_files(self):
-        """Extract currently referenced Swift files from the project"""
-        # Find all Swift file references
-        swift_pattern = r'path = ([^;]+\.swift);'
-        matches = re.findall(swift_pattern, self.project_content)
-        
-        for match in matches:
-            # Remove quotes if present
-            filename = match.strip('"')
-            self.existing_files.add(filename)
+        """Extract the group-resolved paths of every file referenced by the project"""
+        self.existing_files = set(self.graph.file_paths())
             
-    def find_new_swift_files(self):
-        """Find Swift files in VoiceControl directory that aren't in the project"""
-        voice_control_dir = Path("VoiceControl")
+    def discover_files(self, source_root, walker):
+        """Return candidate file paths relative to `source_root`"""
+        if self.discovery != 'git':
+            return walker.walk()
+
+        try:
+            work_tree, git_dir = GitIndex.find(source_root)
+            prefix = os.path.relpath(os.path.abspath(source_root), work_tree).replace(os.sep, '/') + '/'
+            index = GitIndex(git_dir)
+            # The index lists the files inside packages; collapse them to the package
+            tracked = list(dict.fromkeys(walker.package_root(path) for path in index.paths(prefix)
+                                         if not walker.excluded(path)))
+            index_mtime = os.stat(index.path).st_mtime_ns
+        except (OSError, GitIndexError) as e:
+            print(f"Git index unavailable ({e}), walking the source tree instead")
+            return walker.walk()
+
+        # A directory untouched since the index was written holds exactly its
+        # tracked files, so only modified directories are listed: for untracked
+        # files, and for tracked files deleted without `git rm`
+        known_dirs = {'': set()}
+        for path in tracked:
+            directory = posixpath.dirname(path)
+            known_dirs.setdefault(directory, set())
+            while directory:
+                parent, name = posixpath.split(directory)
+                children = known_dirs.setdefault(parent, set())
+                if name in children:
+                    break
+                children.add(name)
+                directory = parent
+        walked = list(walker.walk(known_dirs, index_mtime))
+        visited = set(walker.directories)
+        listed = walker.listed
+
+        def present(path):
+            directory, name = posixpath.split(path)
+            return directory in visited and (directory not in listed or name in listed[directory])
+
+        tracked = [path for path in tracked if present(path)]
+        if not self.include_untracked:
+            return tracked
+        tracked_set = set(tracked)
+        return tracked + [path for path in walked if path not in tracked_set]
+
+    def find_new_source_files(self):
+        """Find files of every known type under the source roots that aren't in the project"""
+        cache = self.scan_cache
+        if cache is None and self.scan_cache_path:
+            cache = ScanCache(self.scan_cache_path)
+            cache.load()
         
-        for swift_file in voice_control_dir.rglob("*.swift"):
-            relative_path = swift_file.relative_to(voice_control_dir)
-            filename = relative_path.name
-            
-            if filename not in self.existing_files:
-                # Determine the group based on directory structure
-                parts = relative_path.parts
-                if len(parts) > 1:
-                    group = parts[0]  # Config, Core, Features, Models, Utils
-                else:
-                    group = "VoiceControl"
-                    
-                self.files_to_add.append({
-                    'path': str(relative_path),
-                    'filename': filename,
-                    'group': group,
-                    'full_path': str(swift_file)
+        files_scanned = 0
+        self.source_dirs = []
+        for source_root in self.source_roots:
+            source_dir = Path(source_root)
+            walker = SourceWalker(str(source_dir), excludes=self.excludes, cache=cache)
+            discovered = set()
+            for relative_name in self.discover_files(str(source_dir), walker):
+                files_scanned += 1
+                kind = file_type(relative_name)
+                if kind is None:
+                    continue
+                relative_path = Path(relative_name)
+                filename = relative_path.name
+                project_relative = f"{source_dir.as_posix()}/{relative_name}"
+                discovered.add(project_relative)
+                
+                if project_relative not in self.existing_files:
+                    file_info = {
+                        'path': str(relative_path),
+                        'filename': filename,
+                        'group': posixpath.dirname(project_relative),
+                        'full_path': (source_dir / relative_path).as_posix(),
+                        'file_type': kind[0],
+                        'phase': kind[1],
+                    }
+                    lproj = relative_path.parent.name
+                    if lproj.endswith('.lproj'):
+                        # One localization of a variant group in the directory above
+                        file_info['group'] = posixpath.dirname(file_info['group'])
+                        file_info['language'] = lproj[:-len('.lproj')]
+                    self.files_to_add.append(file_info)
+
+            if self.sync:
+                self.find_removed_files(source_dir.as_posix() + '/', discovered)
+            self.source_dirs.extend(os.path.join(source_root, directory) if directory else source_root
+                                    for directory in walker.directories)
+
+        self.stats['files_scanned'] = files_scanned
+        self.stats['directories_visited'] = len(self.source_dirs)
+        if cache is not None:
+            self.stats['directories_relisted'] = cache.relisted
+            cache.save()
+
+    def find_removed_files(self, source_prefix, discovered):
+        """Collect references of known file types under the source root whose files are gone
+
+        Only references that discovery didn't report are checked on disk, so
+        files that are merely excluded from discovery are never pruned.
+        """
+        for path, file_ref in self.graph.file_paths().items():
+            if (path.startswith(source_prefix) and file_type(path) is not None
+                    and path not in discovered and not os.path.exists(path)):
+                self.files_to_remove.append({
+                    'path': path[len(source_prefix):],
+                    'filename': posixpath.basename(path),
+                    'file_ref': file_ref,
                 })
+
+    def remove_stale_files(self, editor):
+        """Queue removal of stale file references and everything pointing at them"""
+        graph = self.graph
+        stale = {file_info['file_ref'] for file_info in self.files_to_remove}
+        # A variant group goes with its last localization
+        stale.update(group_id for group_id in graph.ids_by_isa.get('PBXVariantGroup', ())
+                     if graph.objects[group_id].get('children')
+                     and stale.issuperset(graph.objects[group_id]['children']))
+        stale.update(build_id for build_id in graph.ids_by_isa.get('PBXBuildFile', ())
+                     if graph.objects[build_id].get('fileRef') in stale)
+        # Xcode drops sections left without objects
+        emptied = {isa for isa, object_ids in graph.ids_by_isa.items()
+                   if isa and stale.issuperset(object_ids) and editor.remove_section(isa)}
+        for object_id in stale:
+            if graph.objects[object_id].get('isa') not in emptied:
+                editor.remove_object(object_id)
+
+        # Group children and build phase entries, one pass over each list
+        for isa, object_ids in graph.ids_by_isa.items():
+            if isa in ProjectGraph.GROUP_ISAS:
+                key = 'children'
+            elif isa and isa.endswith('BuildPhase'):
+                key = 'files'
+            else:
+                continue
+            for object_id in object_ids:
+                items = graph.objects[object_id].get(key)
+                if object_id not in stale and isinstance(items, PbxList) and not stale.isdisjoint(items):
+                    editor.remove_items(items, stale)
                 
     def update_project(self):
-        """Update the project file with new files"""
-        if not self.files_to_add:
+        """Update the project file with new files (and, when syncing, removed ones)"""
+        if not self.files_to_add and not self.files_to_remove:
             print("No new files to add")
-            return
+            return False
             
-        # Generate UUIDs for each file
-        for file_info in self.files_to_add:
-            file_info['file_ref'] = self.generate_uuid()
-            file_info['build_ref'] = self.generate_uuid()
-            
-        # Find insertion points
-        build_section_match = re.search(r'/\* End PBXBuildFile section \*/', self.project_content)
-        file_ref_section_match = re.search(r'/\* End PBXFileReference section \*/', self.project_content)
-        
-        if not build_section_match or not file_ref_section_match:
-            print("Could not find proper insertion points")
-            return
+        # Every edit is made against offsets into the original text
+        editor = ProjectEditor(self.graph)
+        if self.files_to_add:
+            self.add_file_entries(editor)
+
+        if self.files_to_remove:
+            self.remove_stale_files(editor)
+
+        self.project_content = editor.serialize()
+        self.stats['files_added'] = len(self.files_to_add)
+        self.stats['files_removed'] = len(self.files_to_remove)
+        self.stats['insertions'] = len(editor.plan)
+        return True
             
-        # Create build file entries
-        build_entries = []
+    def add_file_entries(self, editor):
+        """Queue the objects and list entries for every file to add"""
+        # Assign each file to its targets and generate UUIDs for its objects
+        rules = TargetRules(self.graph, TargetRules.load(self.target_rules_path))
+        target_phases = self.graph.target_phases()
+        phase_entries = {}
+        variants = {}
+        grouped = []
         for file_info in self.files_to_add:
-            entry = f"\t\t{file_info['build_ref']} /* {file_info['filename']} in Sources */ = {{isa = PBXBuildFile; fileRef = {file_info['file_ref']} /* {file_info['filename']} */; }};"
-            build_entries.append(entry)
+            file_info['file_ref'] = self.generate_uuid(f"PBXFileReference {file_info['full_path']}")
+            if 'language' in file_info:
+                # Localizations are built through their variant group
+                variant_path = f"{file_info['group']}/{file_info['filename']}"
+                if variant_path not in variants:
+                    variants[variant_path] = self.plan_variant_group(variant_path, file_info)
+                    if variants[variant_path]['new']:
+                        self.add_build_files(variants[variant_path], rules, target_phases, phase_entries)
+                        grouped.append(variants[variant_path])
+                variants[variant_path]['localizations'].append(file_info)
+                continue
+            self.add_build_files(file_info, rules, target_phases, phase_entries)
+            grouped.append(file_info)
             
-        # Create file reference entries
-        file_ref_entries = []
+        # Create build file and file reference objects
+        for file_info in grouped:
+            for build_ref in file_info['build_refs']:
+                editor.add_object(build_ref, {
+                    'isa': 'PBXBuildFile',
+                    'fileRef': (file_info['file_ref'], file_info['filename']),
+                }, f"{file_info['filename']} in {phase_name(file_info['phase'])}")
         for file_info in self.files_to_add:
-            entry = f"\t\t{file_info['file_ref']} /* {file_info['filename']} */ = {{isa = PBXFileReference; lastKnownFileType = sourcecode.swift; path = {file_info['filename']}; sourceTree = \"<group>\"; }};"
-            file_ref_entries.append(entry)
-            
-        # Insert build files
-        build_insert_pos = build_section_match.start()
-        self.project_content = (
-            self.project_content[:build_insert_pos] +
-            '\n'.join(build_entries) + '\n' +
-            self.project_content[build_insert_pos:]
-        )
-        
-        # Update file reference insertion position after build files insertion
-        file_ref_section_match = re.search(r'/\* End PBXFileReference section \*/', self.project_content)
-        file_ref_insert_pos = file_ref_section_match.start()
-        
-        # Insert file references
-        self.project_content = (
-            self.project_content[:file_ref_insert_pos] +
-            '\n'.join(file_ref_entries) + '\n' +
-            self.project_content[file_ref_insert_pos:]
-        )
+            if 'language' in file_info:
+                editor.add_object(file_info['file_ref'], {
+                    'isa': 'PBXFileReference',
+                    'lastKnownFileType': file_info['file_type'],
+                    'name': file_info['language'],
+                    'path': f"{file_info['language']}.lproj/{file_info['filename']}",
+                    'sourceTree': '<group>',
+                }, file_info['language'])
+                continue
+            editor.add_object(file_info['file_ref'], {
+                'isa': 'PBXFileReference',
+                'lastKnownFileType': file_info['file_type'],
+                'path': file_info['filename'],
+                'sourceTree': '<group>',
+            }, file_info['filename'])
+        for variant in variants.values():
+            children = [(file_info['file_ref'], file_info['language']) for file_info in variant['localizations']]
+            if not variant['new']:
+                editor.append_items(self.graph.objects[variant['file_ref']]['children'], children)
+                continue
+            editor.add_object(variant['file_ref'], {
+                'isa': 'PBXVariantGroup',
+                'children': children,
+                'name': variant['filename'],
+                'sourceTree': '<group>',
+            }, variant['filename'])
         
-        # Add files to source build phase
-        sources_pattern = r'(/\* Sources \*/ = \{[^}]+files = \([^)]+)'
-        sources_match = re.search(sources_pattern, self.project_content, re.DOTALL)
-        
-        if sources_match:
-            sources_entries = []
-            for file_info in self.files_to_add:
-                entry = f"\t\t\t\t{file_info['build_ref']} /* {file_info['filename']} in Sources */,"
-                sources_entries.append(entry)
-                
-            insert_pos = sources_match.end()
-            self.project_content = (
-                self.project_content[:insert_pos] +
-                '\n' + '\n'.join(sources_entries) +
-                self.project_content[insert_pos:]
-            )
-            
-        # Add files to appropriate groups
-        for group_name in set(f['group'] for f in self.files_to_add):
-            self.add_files_to_group(group_name)
+        # Add files to the matching build phase of each of their targets
+        for phase_id, entries in phase_entries.items():
+            editor.append_items(self.graph.objects[phase_id]['files'], entries)
+        self.stats['phases_updated'] = len(phase_entries)
             
-    def add_files_to_group(self, group_name):
-        """Add file references to the appropriate group"""
-        group_files = [f for f in self.files_to_add if f['group'] == group_name]
+        # Add files and new variant groups to the groups mirroring their directories
+        files_by_group = {}
+        for file_info in grouped:
+            files_by_group.setdefault(file_info['group'], []).append(file_info)
+        group_edits = {}
+        created_dirs = {}
+        for group_dir, group_files in files_by_group.items():
+            self.add_files_to_group(group_dir, group_files, group_edits, created_dirs)
+        self.write_group_entries(group_edits, editor)
+
+    def add_build_files(self, file_info, rules, target_phases, phase_entries):
+        """Plan a build file in the matching phase of every target that builds the file"""
+        file_info['build_refs'] = []
+        for target_id in rules.targets_for(file_info['full_path']):
+            phase_id = target_phases[target_id].get(file_info['phase'])
+            if phase_id is None:
+                continue
+            build_ref = self.generate_uuid(f"PBXBuildFile {target_id} {file_info['full_path']}")
+            file_info['build_refs'].append(build_ref)
+            phase_entries.setdefault(phase_id, []).append(
+                (build_ref, f"{file_info['filename']} in {phase_name(file_info['phase'])}"))
+        # Headers of app targets are project-only, as in Xcode
+        if not file_info['build_refs'] and file_info['phase'] != 'PBXHeadersBuildPhase':
+            print(f"Warning: no target builds {file_info['path']}; adding a file reference only")
+
+    def plan_variant_group(self, variant_path, file_info):
+        """Return the variant group at `variant_path`, with a new ID if the project has none"""
+        variant_id = self.graph.variant_groups().get(variant_path)
+        return {
+            'file_ref': variant_id or self.generate_uuid(f"PBXVariantGroup {variant_path}"),
+            'new': variant_id is None,
+            'path': variant_path,
+            'filename': file_info['filename'],
+            'group': file_info['group'],
+            'full_path': variant_path,
+            'phase': file_info['phase'],
+            'build_refs': [],
+            'localizations': [],
+        }
+
+    def ensure_group(self, group_dir, group_edits, created_dirs):
+        """Return the ID of the group for `group_dir`, planning any missing groups"""
+        group_id = self.graph.group_dirs().get(group_dir) or created_dirs.get(group_dir)
+        if group_id is not None:
+            return group_id
+        if group_dir in ('.', ''):
+            # No group maps to the project root (projectDirPath or a main group path moved it)
+            return self.graph.objects[self.graph.root['rootObject']]['mainGroup']
+        parent_id = self.ensure_group(posixpath.dirname(group_dir) or '.', group_edits, created_dirs)
+        name = posixpath.basename(group_dir)
+        group_id = self.generate_uuid(f"PBXGroup {group_dir}")
+        created_dirs[group_dir] = group_id
+        group_edits[group_id] = {'name': name, 'children': [], 'new': True}
+        self.group_children(parent_id, group_edits).append((group_id, name))
+        return group_id
+
+    def group_children(self, group_id, group_edits):
+        """Return the list collecting (ID, name) children to add to `group_id`"""
+        if group_id not in group_edits:
+            group_edits[group_id] = {'children': [], 'new': False}
+        return group_edits[group_id]['children']
+
+    def add_files_to_group(self, group_dir, group_files, group_edits, created_dirs):
+        """Add file references to the group for their directory"""
         if not group_files:
             return
+        group_id = self.ensure_group(group_dir, group_edits, created_dirs)
+        children = self.group_children(group_id, group_edits)
+        children.extend((file_info['file_ref'], file_info['filename']) for file_info in group_files)
+
+    def write_group_entries(self, group_edits, editor):
+        """Queue new group objects and the children added to existing groups"""
+        groups_created = 0
+        for group_id, group in group_edits.items():
+            if not group['new']:
+                editor.append_items(self.graph.objects[group_id]['children'], group['children'])
+                continue
+            editor.add_object(group_id, {
+                'isa': 'PBXGroup',
+                'children': group['children'],
+                'path': group['name'],
+                'sourceTree': '<group>',
+            }, group['name'])
+            groups_created += 1
+        if groups_created:
+            self.stats['groups_created'] = groups_created
             
-        # Find the group section
-        group_pattern = rf'(path = {group_name};[^}}]+children = \([^)]+)'
-        group_match = re.search(group_pattern, self.project_content, re.DOTALL)
-        
-        if group_match:
-            group_entries = []
-            for file_info in group_files:
-                entry = f"\t\t\t\t{file_info['file_ref']} /* {file_info['filename']} */,"
-                group_entries.append(entry)
-                
-            insert_pos = group_match.end()
-            self.project_content = (
-                self.project_content[:insert_pos] +
-                '\n' + '\n'.join(group_entries) +
-                self.project_content[insert_pos:]
-            )
-            
+    def normalize_project(self):
+        """Put the project in canonical order: objects sorted by ID within each
+        section, group children sorted by name, duplicate build files removed
+
+        Only out-of-order sections and groups are rewritten, so a second run
+        changes nothing.
+        """
+        if self.graph.text is not self.project_content:
+            self.parse_project()
+        graph = self.graph
+        editor = ProjectEditor(graph)
+        removed = self.remove_duplicate_build_files(editor)
+
+        sections_sorted = 0
+        for isa in graph.ids_by_isa:
+            if isa and editor.sort_section(isa, removed):
+                sections_sorted += 1
+
+        def display_name(child_id):
+            child = graph.objects.get(child_id, {})
+            name = child.get('name') or child.get('path') or child_id
+            return name.casefold(), name, child_id
+
+        groups_sorted = 0
+        for isa in ProjectGraph.GROUP_ISAS:
+            for group_id in graph.ids_by_isa.get(isa, ()):
+                children = graph.objects[group_id].get('children')
+                if isinstance(children, PbxList) and editor.sort_items(children, display_name):
+                    groups_sorted += 1
+
+        self.project_content = editor.serialize()
+        self.stats['sections_sorted'] = sections_sorted
+        self.stats['groups_sorted'] = groups_sorted
+        self.stats['build_files_deduped'] = len(removed)
+        print(f"Sorted {sections_sorted} sections and {groups_sorted} groups, "
+              f"removed {len(removed)} duplicate build files")
+
+    def remove_duplicate_build_files(self, editor):
+        """Drop repeated build phase entries and build files duplicating another in the same phase
+
+        Returns the IDs of build file objects that are no longer referenced.
+        """
+        graph = self.graph
+        phase_ids = [object_id for isa, object_ids in graph.ids_by_isa.items()
+                     if isa and isa.endswith('BuildPhase') for object_id in object_ids]
+        references = {}
+        for phase_id in phase_ids:
+            for build_id in graph.objects[phase_id].get('files', ()):
+                references[build_id] = references.get(build_id, 0) + 1
+
+        removed = set()
+        for phase_id in phase_ids:
+            files = graph.objects[phase_id].get('files')
+            if not isinstance(files, PbxList):
+                continue
+            seen_ids = set()
+            seen_files = set()
+
+            def keep(build_id):
+                build = graph.objects.get(build_id, {})
+                ref = build.get('fileRef') or build.get('productRef')
+                key = (ref, repr(build.get('settings')))
+                if build_id in seen_ids:
+                    references[build_id] -= 1
+                    return False
+                seen_ids.add(build_id)
+                if ref is not None and key in seen_files:
+                    references[build_id] -= 1
+                    if not references[build_id]:
+                        removed.add(build_id)
+                    return False
+                seen_files.add(key)
+                return True
+
+            if len(files) > 1:
+                editor.filter_items(files, keep)
+        return removed
+
     def write_project(self):
-        """Write the updated project file"""
-        with open(self.project_path, 'w') as f:
-            f.write(self.project_content)
+        """Write the updated project file, returning False if nothing changed
+
+        An unchanged project is left untouched so its mtime (and Xcode's
+        project cache) survive. Otherwise the content goes to a temporary
+        file in the same directory that atomically replaces the original,
+        so an interrupted run never leaves a truncated project behind.
+        """
+        if self.project_content is self.original_content or (
+                len(self.project_content) == len(self.original_content)
+                and memoryview(self.project_content) == memoryview(self.original_content)):
+            return False
+
+        directory = os.path.dirname(os.path.abspath(self.project_path))
+        with tempfile.NamedTemporaryFile('wb', dir=directory, prefix='.project.pbxproj.',
+                                         delete=False) as f:
+            temp_path = f.name
+            try:
+                f.write(self.project_content)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            except BaseException:
+                f.close()
+                os.unlink(temp_path)
+                raise
+        try:
+            os.chmod(temp_path, os.stat(self.project_path).st_mode & 0o7777)
+        except OSError:
+            pass
+        os.replace(temp_path, self.project_path)
+        self.project_stat = os.stat(self.project_path)
+        self.stats['bytes_written'] = len(self.project_content)
+
+        if self.fsync:
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        self.original_content = self.project_content
+        return True
             
-    def run(self):
+    def input_fingerprint(self, tree=None):
+        """Hash the project bytes together with a tree_fingerprint()
+
+        Pass the tree fingerprint taken before discovery when recording a
+        stamp, so files created while the update runs aren't counted as seen.
+        """
+        digest = hashlib.sha256()
+        digest.update((tree or self.tree_fingerprint()).encode())
+        with open(self.project_path, 'rb') as f:
+            digest.update(f.read())
+        return digest.hexdigest()
+
+    def tree_fingerprint(self):
+        """Hash the options and the state of the source tree
+
+        Directory mtimes and inodes from the scan cache stand in for the file
+        list: any file added, removed or renamed changes its directory's
+        entry. A missing cache is filled by a walk first, so cold and warm
+        runs hash the same way. Without a scan cache path the walked file
+        list is hashed instead.
+        """
+        digest = hashlib.sha256()
+        digest.update(repr((self.discovery, self.include_untracked, tuple(self.excludes), self.sync,
+                            self.normalize, tuple(self.source_roots))).encode())
+
+        inputs = ['.gitignore', os.path.join('.git', 'info', 'exclude')]
+        if self.target_rules_path:
+            inputs.append(self.target_rules_path)
+        if self.discovery == 'git':
+            inputs.append(os.path.join('.git', 'index'))
+        if self.scan_cache_path:
+            cache = ScanCache(self.scan_cache_path)
+            cache.load()
+            if not cache.dirs:
+                # The walk also warms the cache for discovery
+                for source_root in self.source_roots:
+                    for _ in SourceWalker(source_root, excludes=self.excludes, cache=cache).walk():
+                        pass
+                cache.save()
+            inputs.extend(sorted(cache.dirs))
+        else:
+            for source_root in self.source_roots:
+                walker = SourceWalker(source_root, excludes=self.excludes)
+                digest.update('\0'.join(walker.walk()).encode('utf-8', 'surrogateescape'))
+
+        for path in inputs:
+            try:
+                stat = os.stat(path)
+                digest.update(f"{path}\0{stat.st_mtime_ns}\0{stat.st_ino}\0{stat.st_size}\n".encode())
+            except OSError:
+                digest.update(f"{path}\0missing\n".encode())
+        return digest.hexdigest()
+
+    def read_stamp(self):
+        """Return the fingerprint recorded by the last successful run"""
+        try:
+            with open(self.stamp_path, 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def write_stamp(self, tree):
+        """Record the fingerprint of the written project and the tree as seen before discovery"""
+        with open(self.stamp_path, 'w') as f:
+            f.write(self.input_fingerprint(tree) + '\n')
+
+    def phase(self, name):
+        """Context manager that times phase `name` when profiling is enabled"""
+        if self.profiler is None:
+            return contextlib.nullcontext()
+        return self.profiler.phase(name)
+
+    def profile_report(self):
+        """Return the profiling report of the last run"""
+        return self.profiler.report(self.stats)
+
+    def run(self, force=False):
         """Execute the update process"""
+        if self.profiler is not None:
+            self.profiler.start()
+        try:
+            self.run_phases(force)
+        finally:
+            if self.profiler is not None:
+                self.profiler.stop()
+
+    def run_phases(self, force):
+        """Run every phase of an update"""
+        with self.phase('check_stamp'):
+            tree = self.tree_fingerprint() if self.stamp_path else None
+            up_to_date = tree and not force and self.read_stamp() == self.input_fingerprint(tree)
+        if up_to_date:
+            print("Project is up to date.")
+            return
+
         print("Reading project file...")
-        self.read_project()
+        with self.phase('read'):
+            self.read_project()
+
+        print("Parsing project file...")
+        with self.phase('parse'):
+            self.parse_project()
         
+        if not self.add_new_files():
+            return
+
+        if self.stamp_path:
+            with self.phase('write_stamp'):
+                self.write_stamp(tree)
+
+    def add_new_files(self):
+        """Add every discovered file missing from the parsed project"""
         print("Extracting existing files...")
-        self.extract_existing_files()
+        with self.phase('extract'):
+            self.extract_existing_files()
         
-        print("Finding new Swift files...")
-        self.find_new_swift_files()
+        print("Finding new source files...")
+        with self.phase('discover'):
+            self.find_new_source_files()
         
-        if self.files_to_add:
-            print(f"\nFound {len(self.files_to_add)} new files to add:")
-            for file_info in self.files_to_add:
-                print(f"  - {file_info['path']}")
+        updated = False
+        if self.files_to_add or self.files_to_remove:
+            if self.files_to_add:
+                print(f"\nFound {len(self.files_to_add)} new files to add:")
+                for file_info in self.files_to_add:
+                    print(f"  - {file_info['path']}")
+            if self.files_to_remove:
+                print(f"\nFound {len(self.files_to_remove)} missing files to remove:")
+                for file_info in self.files_to_remove:
+                    print(f"  - {file_info['path']}")
                 
             print("\nUpdating project file...")
-            self.update_project()
-            
+            with self.phase('update'):
+                updated = self.update_project()
+            if not updated:
+                return False
+        elif self.sync:
+            print("\nProject is in sync with the source tree.")
+        else:
+            print("\nNo new files found to add.")
+
+        if self.normalize:
+            print("\nNormalizing project file...")
+            with self.phase('normalize'):
+                self.normalize_project()
+
+        if updated or self.normalize:
             print("Writing updated project file...")
-            self.write_project()
-            
+            with self.phase('write'):
+                written = self.write_project()
+            if not written:
+                print("Project file content is unchanged; left it untouched")
+        
+        if updated:
             print("\nProject updated successfully!")
             print("\nNext steps:")
             print("1. Open Xcode and verify the files appear correctly")
             print("2. Build the project to ensure everything compiles")
             print("3. If needed, manually adjust file locations in Xcode")
+        return True
+
+
+class ProjectSession:
+    """Parsed project and directory listings kept in memory across updates
+
+    The project file's stat signature is checked before every update, so
+    edits made in Xcode are picked up before the next update is computed.
+    """
+
+    def __init__(self, updater_options=None):
+        self.updater_options = dict(updater_options or {}, stamp_path=None)
+        self.content = None
+        self.graph = None
+        self.signature = None
+        self.scan_cache = None
+
+    @staticmethod
+    def file_signature(path):
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def make_updater(self, **overrides):
+        """Return an updater primed with the cached project state"""
+        updater = XcodeProjectUpdater(**dict(self.updater_options, **overrides))
+        if self.scan_cache is None and updater.scan_cache_path:
+            self.scan_cache = ScanCache(updater.scan_cache_path)
+            self.scan_cache.load()
+        updater.scan_cache = self.scan_cache
+
+        signature = self.file_signature(updater.project_path)
+        if signature != self.signature:
+            updater.read_project()
+            self.content = updater.project_content
+            self.graph = None
+            self.signature = signature
         else:
-            print("\nNo new files found to add.")
+            updater.project_content = updater.original_content = self.content
+        if self.graph is None:
+            updater.parse_project()
+            self.graph = updater.graph
+        else:
+            updater.attach_graph(self.graph)
+        return updater
+
+    def add_new_files(self, **overrides):
+        """Run one update against the cached state and return its updater"""
+        updater = self.make_updater(**overrides)
+        updater.add_new_files()
+        if updater.project_content is not self.content:
+            # Offsets in the cached graph no longer match; re-parse lazily
+            self.content = updater.project_content
+            self.graph = None
+            self.signature = self.file_signature(updater.project_path)
+        return updater
+
+
+class ProjectDaemon:
+    """Long-lived server that keeps the parsed project and directory index hot
+
+    Each connection on the Unix domain socket carries one JSON request line
+    and gets one JSON reply line. scripts/add_files_client.py sends them
+    without loading this module.
+    """
+
+    DEFAULT_SOCKET = ".add_files.sock"
+    # Seconds a client may take to send its request line
+    REQUEST_TIMEOUT = 5
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, updater_options=None):
+        self.socket_path = socket_path
+        self.session = ProjectSession(updater_options)
+        self.running = False
+
+    def handle(self, request):
+        """Execute one request and return the reply"""
+        command = request.get('command', 'add')
+        if command == 'ping':
+            return {'ok': True}
+        if command == 'shutdown':
+            self.running = False
+            return {'ok': True}
+        if command not in ('add', 'sync'):
+            return {'ok': False, 'error': f"Unknown command: {command}"}
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            if command == 'sync':
+                updater = self.session.add_new_files(sync=True)
+            else:
+                updater = self.session.add_new_files()
+        return {'ok': True, 'added': [f['path'] for f in updater.files_to_add],
+                'removed': [f['path'] for f in updater.files_to_remove], 'output': output.getvalue()}
+
+    def serve(self):
+        """Accept requests until a shutdown request or SIGTERM"""
+        if os.path.exists(self.socket_path):
+            try:
+                send_request(self.socket_path, {'command': 'ping'})
+            except ConnectionRefusedError:
+                os.unlink(self.socket_path)  # Left behind by a daemon that died
+            else:
+                raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        previous_handler = signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        try:
+            server.bind(self.socket_path)
+            server.listen()
+            self.running = True
+            print(f"Listening on {self.socket_path}")
+            while self.running:
+                connection, _ = server.accept()
+                with connection:
+                    self.serve_connection(connection)
+        finally:
+            server.close()
+            signal.signal(signal.SIGTERM, previous_handler)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def serve_connection(self, connection):
+        # Requests are served one at a time, so an idle client must not hold the loop
+        connection.settimeout(self.REQUEST_TIMEOUT)
+        try:
+            with connection.makefile('rb') as stream:
+                data = stream.readline()
+            reply = self.handle(json.loads(data or b'{}'))
+        except Exception as e:
+            reply = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+        try:
+            connection.sendall(json.dumps(reply).encode() + b'\n')
+        except OSError:
+            pass  # The client went away before the reply; keep serving the others
+
+
+class InotifyWatcher:
+    """Directory watcher backed by Linux inotify through libc"""
+
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    IN_ONLYDIR = 0x01000000
+    WATCH_MASK = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+    EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self, relevant):
+        self.relevant = relevant
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+
+    def sync(self, paths):
+        """Watch exactly `paths`, adding and dropping watches as needed
+
+        Returns (path, reason) for each directory that couldn't be watched.
+        """
+        wanted = set(paths)
+        for wd, path in list(self.watches.items()):
+            if path not in wanted:
+                self.libc.inotify_rm_watch(self.fd, wd)
+                del self.watches[wd]
+        watched = set(self.watches.values())
+        failed = []
+        for path in wanted - watched:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+            if wd >= 0:
+                self.watches[wd] = path
+            elif ctypes.get_errno() != errno.ENOENT:
+                # ENOSPC means fs.inotify.max_user_watches is exhausted
+                failed.append((path, os.strerror(ctypes.get_errno())))
+        return failed
+
+    def wait(self, timeout):
+        """Block up to `timeout` seconds (None: forever); return (any event, any relevant change)"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False, False
+        data = os.read(self.fd, 64 * 1024)
+        changed = False
+        pos = 0
+        while pos < len(data):
+            wd, mask, _, length = self.EVENT_HEADER.unpack_from(data, pos)
+            pos += self.EVENT_HEADER.size
+            name = data[pos:pos + length].rstrip(b'\0').decode('utf-8', 'surrogateescape')
+            pos += length
+            if mask & self.IN_IGNORED:
+                self.watches.pop(wd, None)
+            elif mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF) or self.relevant(name, bool(mask & self.IN_ISDIR)):
+                changed = True
+        return True, changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class KqueueWatcher:
+    """Directory watcher backed by kqueue vnode events (macOS and BSD)"""
+
+    O_EVTONLY = 0x8000
+    FD_HEADROOM = 64
+
+    def __init__(self, relevant):
+        self.relevant = relevant
+        self.kqueue = select.kqueue()
+        self.watches = {}
+        self.open_flags = os.O_RDONLY | (self.O_EVTONLY if sys.platform == 'darwin' else 0)
+
+    def raise_fd_limit(self, needed):
+        """Raise the soft open-file limit toward `needed`, as far as the hard limit allows"""
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft != resource.RLIM_INFINITY and soft < needed:
+            target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+            try:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            except (ValueError, OSError):
+                pass  # macOS caps the soft limit at kern.maxfilesperproc; fall back to rescans
 
-def main():
+    def sync(self, paths):
+        """Watch exactly `paths`, adding and dropping watches as needed
+
+        Returns (path, reason) for each directory that couldn't be watched.
+        """
+        wanted = set(paths)
+        for path in list(self.watches):
+            if path not in wanted:
+                os.close(self.watches.pop(path))
+        # One descriptor per watched directory, plus headroom for everything else
+        self.raise_fd_limit(len(wanted) + self.FD_HEADROOM)
+        fflags = select.KQ_NOTE_WRITE | select.KQ_NOTE_DELETE | select.KQ_NOTE_RENAME | select.KQ_NOTE_EXTEND
+        failed = []
+        for path in wanted - set(self.watches):
+            try:
+                fd = os.open(path, self.open_flags)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                failed.append((path, e.strerror))
+                continue
+            self.watches[path] = fd
+            event = select.kevent(fd, filter=select.KQ_FILTER_VNODE,
+                                  flags=select.KQ_EV_ADD | select.KQ_EV_CLEAR, fflags=fflags)
+            self.kqueue.control([event], 0)
+        return failed
+
+    def wait(self, timeout):
+        """Block up to `timeout` seconds (None: forever); return (any event, any relevant change)
+
+        kqueue only says that a directory changed, not which entry, so every
+        event counts as relevant.
+        """
+        changed = bool(self.kqueue.control(None, 64, timeout))
+        return changed, changed
+
+    def close(self):
+        for fd in self.watches.values():
+            os.close(fd)
+        self.kqueue.close()
+
+
+class ProjectWatcher:
+    """Adds new source files to the project as they appear on disk
+
+    Directory events are debounced: after the first relevant event the
+    watcher keeps draining until the tree has been quiet for `quiet_period`
+    seconds (or `max_delay` has passed), then applies one batched update
+    against the in-memory session, so a checkout that drops hundreds of
+    files costs a single walk and a single project write. While draining,
+    irrelevant events (object files, editor swap files) still count as
+    activity. If some directories can't be watched, the tree is also
+    rescanned every `rescan_interval` seconds.
+    """
+
+    def __init__(self, updater_options=None, quiet_period=0.3, max_delay=5.0, rescan_interval=10.0):
+        self.session = ProjectSession(updater_options)
+        self.quiet_period = quiet_period
+        self.max_delay = max_delay
+        self.rescan_interval = rescan_interval
+        self.unwatched = []
+
+    @staticmethod
+    def relevant(name, is_dir):
+        return is_dir or file_type(name) is not None
+
+    def make_backend(self):
+        if hasattr(select, 'kqueue'):
+            return KqueueWatcher(self.relevant)
+        if sys.platform.startswith('linux'):
+            return InotifyWatcher(self.relevant)
+        raise RuntimeError("Watch mode needs inotify (Linux) or kqueue (macOS/BSD)")
+
+    def watched_dirs(self, updater):
+        """Return the directories to watch after an update"""
+        if updater.source_dirs:
+            return updater.source_dirs
+        directories = []
+        for source_root in updater.source_roots:
+            walker = SourceWalker(source_root, excludes=updater.excludes)
+            for _ in walker.walk():
+                pass
+            directories.extend(os.path.join(source_root, directory) if directory else source_root
+                               for directory in walker.directories)
+        return directories
+
+    def update(self, backend, quiet=False):
+        """Apply one update, re-sync the watches with the current tree and return the updater
+
+        A `quiet` update only reports anything if it added files.
+        """
+        if quiet:
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                updater = self.session.add_new_files()
+            if updater.files_to_add:
+                print('\n' + output.getvalue(), end='')
+        else:
+            updater = self.session.add_new_files()
+        failed = sorted(backend.sync(self.watched_dirs(updater)))
+        if failed and failed != self.unwatched:
+            print(f"Warning: could not watch {len(failed)} directories; "
+                  f"rescanning every {self.rescan_interval:g}s instead:")
+            for path, reason in failed:
+                print(f"  - {path} ({reason})")
+        self.unwatched = failed
+        return updater
+
+    def watch(self):
+        """Watch until interrupted"""
+        backend = self.make_backend()
+        try:
+            roots = self.update(backend).source_roots
+            print(f"\nWatching {', '.join(f'{root}/' for root in roots)} for new files (Ctrl-C to stop)...")
+            while True:
+                timeout = self.rescan_interval if self.unwatched else None
+                event, changed = backend.wait(timeout)
+                if not event:
+                    # Periodic rescan, for changes in unwatched directories
+                    self.update(backend, quiet=True)
+                    continue
+                if not changed:
+                    continue
+                deadline = time.monotonic() + self.max_delay
+                while time.monotonic() < deadline and backend.wait(self.quiet_period)[0]:
+                    pass
+                print()
+                self.update(backend)
+        except KeyboardInterrupt:
+            print("\nStopped watching.")
+        finally:
+            backend.close()
+
+
+class Workspace:
+    """Projects referenced by an .xcworkspace, updated in parallel
+
+    contents.xcworkspacedata lists FileRefs, possibly inside nested Groups,
+    whose locations are `group:` paths relative to the enclosing group,
+    `container:` paths relative to the workspace's directory or `absolute:`
+    paths. Every project is updated in a worker process of its own, with its
+    caches and stamp next to it under the project's name, so a large workspace takes about as long as
+    its slowest project rather than the sum of all of them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.root = os.path.dirname(os.path.abspath(path))
+
+    @staticmethod
+    def find(directory='.'):
+        """Return the first .xcworkspace in `directory`, or None"""
+        names = sorted(name for name in os.listdir(directory) if name.endswith('.xcworkspace'))
+        return os.path.join(directory, names[0]) if names else None
+
+    def projects(self):
+        """Return the absolute paths of the .xcodeproj bundles the workspace references"""
+        tree = ElementTree.parse(os.path.join(self.path, 'contents.xcworkspacedata'))
+        projects = []
+        self.collect_projects(tree.getroot(), self.root, projects)
+        return list(dict.fromkeys(projects))
+
+    def collect_projects(self, element, group_dir, projects):
+        """Append the projects under a Workspace or Group element to `projects`, in document order"""
+        for child in element:
+            kind, _, path = child.get('location', '').partition(':')
+            if kind == 'group':
+                resolved = os.path.join(group_dir, path)
+            elif kind == 'container':
+                resolved = os.path.join(self.root, path)
+            elif kind == 'absolute':
+                resolved = path
+            elif child.tag == 'Group' and not kind:
+                resolved = group_dir
+            else:
+                continue  # self: and developer: references aren't projects of their own
+            if child.tag == 'Group':
+                self.collect_projects(child, resolved, projects)
+            elif child.tag == 'FileRef' and resolved.endswith('.xcodeproj'):
+                projects.append(os.path.normpath(resolved))
+
+    @staticmethod
+    def source_roots(project_path):
+        """Return the on-disk directories of the main group's top-level groups
+
+        Paths are relative to the directory holding the .xcodeproj. Only the
+        PBXProject and PBXGroup sections are read. A directory holding an
+        .xcodeproj of its own (such as the Pods group of a CocoaPods app) is
+        that project's tree, not a source root.
+        """
+        objects = dict(iter_objects(os.path.join(project_path, 'project.pbxproj'), ('PBXProject', 'PBXGroup')))
+        project_root = os.path.dirname(project_path)
+        roots = []
+        for obj in objects.values():
+            if obj.get('isa') != 'PBXProject':
+                continue
+            project_dir = posixpath.normpath(obj.get('projectDirPath') or '.')
+            main_group = objects.get(obj.get('mainGroup'), {})
+            main_dir = posixpath.normpath(posixpath.join(project_dir, main_group.get('path', '')))
+            for child in main_group.get('children', ()):
+                group = objects.get(child, {})
+                if not group.get('path'):
+                    continue
+                source_tree = group.get('sourceTree', '<group>')
+                if source_tree == '<group>':
+                    root = posixpath.normpath(posixpath.join(main_dir, group['path']))
+                elif source_tree == 'SOURCE_ROOT':
+                    root = posixpath.normpath(posixpath.join(project_dir, group['path']))
+                else:
+                    continue
+                directory = os.path.join(project_root, root)
+                if not os.path.isdir(directory) or root in roots:
+                    continue
+                if not any(name.endswith('.xcodeproj') for name in list_directory(directory)[0]):
+                    roots.append(root)
+        return roots
+
+    def update(self, options, force=False, jobs=None):
+        """Update every project in a process pool; return their reports in workspace order"""
+        projects = self.projects()
+        if not projects:
+            return []
+        workers = min(jobs or os.cpu_count() or 1, len(projects))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(update_workspace_project, projects,
+                                 [options] * len(projects), [force] * len(projects)))
+
+    def print_report(self, reports):
+        """Print one line per project and the workspace totals; return the number of failures"""
+        print(f"Workspace {os.path.basename(os.path.normpath(self.path))}: {len(reports)} projects")
+        width = max((len(os.path.relpath(report['project'], self.root)) for report in reports), default=0)
+        for report in reports:
+            name = os.path.relpath(report['project'], self.root).ljust(width)
+            if report['status'] == 'updated':
+                detail = f"{report['added']} added, {report['removed']} removed"
+            elif report['status'] in ('error', 'missing', 'skipped'):
+                detail = report['error']
+            else:
+                detail = ', '.join(report['roots'])
+            print(f"  {name}  {report['status']}: {detail}")
+            for line in report['output'].splitlines():
+                if line.startswith('Warning'):
+                    print(f"      {line}")
+        updated = [report for report in reports if report['status'] == 'updated']
+        failed = [report for report in reports if report['status'] == 'error']
+        print(f"Total: {sum(report['added'] for report in updated)} files added, "
+              f"{sum(report['removed'] for report in updated)} removed in {len(updated)} of {len(reports)} projects"
+              + (f"; {len(failed)} failed" if failed else ""))
+        return len(failed)
+
+
+def update_workspace_project(project_path, options, force=False):
+    """Update one workspace project and return its report
+
+    Runs in a pool worker, which moves into the directory holding the
+    .xcodeproj so the project's own target rules apply; its caches and
+    stamp are named after the project.
+    The update's output is captured for the aggregated report.
+    """
+    report = {'project': project_path, 'status': 'error', 'roots': [], 'added': 0, 'removed': 0,
+              'error': None, 'output': ''}
+    if not os.path.isfile(os.path.join(project_path, 'project.pbxproj')):
+        report.update(status='missing', error="project.pbxproj not found")
+        return report
+    output = io.StringIO()
+    try:
+        os.chdir(os.path.dirname(project_path))
+        name = os.path.basename(project_path)
+        report['roots'] = Workspace.source_roots(name)
+        if not report['roots']:
+            report.update(status='skipped', error="no source groups found on disk")
+            return report
+        # Sibling projects share the directory, so the state files carry the project's name
+        stem = os.path.splitext(name)[0]
+        options = dict(options, stamp_path=f".add_files_{stem}.stamp",
+                       scan_cache_path=f".add_files_{stem}_scan_cache.json",
+                       snapshot_path=f".add_files_{stem}_project_cache.bin")
+        updater = XcodeProjectUpdater(project_path=os.path.join(name, 'project.pbxproj'),
+                                      source_roots=report['roots'], **options)
+        with contextlib.redirect_stdout(output):
+            updater.run(force=force)
+    except Exception as e:
+        # One broken project must not take down the report for the others
+        report['error'] = f"{type(e).__name__}: {e}"
+        return report
+    finally:
+        report['output'] = output.getvalue()
+    if 'bytes_read' not in updater.stats:
+        report['status'] = 'up to date'
+    elif 'bytes_written' in updater.stats:
+        report.update(status='updated', added=updater.stats.get('files_added', 0),
+                      removed=updater.stats.get('files_removed', 0))
+    else:
+        report['status'] = 'unchanged'
+    return report
+
+
+def send_request(socket_path, request, timeout=60):
+    """Send one request to a running daemon and return its reply"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path)
+        client.sendall(json.dumps(request).encode() + b'\n')
+        with client.makefile('rb') as stream:
+            reply = stream.readline()
+    if not reply:
+        raise ConnectionError("Daemon closed the connection without replying")
+    return json.loads(reply)
+
+
+def merge_driver(base_path, ours_path, theirs_path):
+    """Merge three versions of a project file into `ours_path`; return 1 on conflicts"""
+    texts = []
+    for path in (base_path, ours_path, theirs_path):
+        with open(path, 'rb') as f:
+            texts.append(f.read())
+    merger = ProjectMerger(*texts)
+    merged = merger.merge()
+    if not merger.conflicts:
+        # Never let git record a clean merge of a project Xcode can't open
+        try:
+            ProjectGraph(merged)
+        except PbxprojParseError as e:
+            print(f"Merged project does not parse ({e}); leaving both versions for a manual merge")
+            merger.conflicts.append(('(file)', ['(unparsable result)']))
+            merged = b"<<<<<<< ours\n" + texts[1] + b"=======\n" + texts[2] + b">>>>>>> theirs\n"
+    with open(ours_path, 'wb') as f:
+        f.write(merged)
+    print(f"Merged {merger.merged} objects from theirs")
+    if merger.conflicts:
+        print(f"{len(merger.conflicts)} conflicting objects:")
+        for object_id, keys in merger.conflicts:
+            print(f"  - {object_id}: {', '.join(keys)}")
+        return 1
+    return 0
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Add new source files to VoiceControl.xcodeproj")
+    parser.add_argument('--discovery', choices=('walk', 'git'), default='walk',
+                        help="list candidate files by walking the tree or by reading .git/index")
+    parser.add_argument('--tracked-only', action='store_true',
+                        help="with --discovery git, leave untracked files out")
+    parser.add_argument('--exclude', action='append', default=[], metavar='PATTERN',
+                        help="gitignore-style pattern of paths to skip, on top of the built-in excludes "
+                             "(repeatable; a trailing / matches directories only)")
+    parser.add_argument('--force', action='store_true',
+                        help="run even if the inputs match the last stamp")
+    parser.add_argument('--fsync', action='store_true',
+                        help="fsync the project file and its directory after writing")
+    parser.add_argument('--targets', default=TargetRules.DEFAULT_PATH, metavar='PATH',
+                        help="JSON file mapping target names to the globs of files they build")
+    parser.add_argument('--random-ids', action='store_true',
+                        help="allocate random object IDs instead of IDs derived from file paths")
+    parser.add_argument('--profile', nargs='?', const='add_files_profile.json', metavar='PATH',
+                        help="record per-phase wall/CPU time and counters as JSON")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="with --profile, also record each phase's peak memory (slows the timed phases)")
+    parser.add_argument('--pstats', metavar='PATH',
+                        help="with --profile, also dump cProfile statistics to PATH")
+    parser.add_argument('--daemon', action='store_true',
+                        help="keep the parsed project hot and serve requests on a Unix socket")
+    parser.add_argument('--sync', action='store_true',
+                        help="also remove references to source files that no longer exist")
+    parser.add_argument('--normalize', action='store_true',
+                        help="sort objects by ID, group children by name and drop duplicate build files")
+    parser.add_argument('--client', nargs='?', const='add', choices=('add', 'sync', 'ping', 'shutdown'),
+                        help="send a request to a running daemon instead of updating in-process "
+                             "(scripts/add_files_client.py does the same with a faster start-up)")
+    parser.add_argument('--watch', action='store_true',
+                        help="keep running and add new files as they appear (inotify or kqueue)")
+    parser.add_argument('--merge-driver', nargs=3, metavar=('BASE', 'OURS', 'THEIRS'),
+                        help="merge three versions of project.pbxproj into OURS (git merge driver: %%O %%A %%B)")
+    parser.add_argument('--workspace', nargs='?', const='', metavar='PATH',
+                        help="update every project of an .xcworkspace (default: the one in this directory) in parallel")
+    parser.add_argument('--jobs', type=int, metavar='N',
+                        help="with --workspace, number of worker processes (default: one per CPU)")
+    parser.add_argument('--socket', default=ProjectDaemon.DEFAULT_SOCKET,
+                        help="Unix socket used by --daemon and --client")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main entry point"""
+    args = parse_args(argv)
+
+    if args.merge_driver:
+        sys.exit(merge_driver(*args.merge_driver))
+
+    if args.client:
+        try:
+            reply = send_request(args.socket, {'command': args.client})
+        except (ConnectionRefusedError, FileNotFoundError) as e:
+            if args.client not in ('add', 'sync'):
+                print(f"Error: no daemon reachable on {args.socket} ({e})")
+                return
+            print(f"No daemon reachable on {args.socket} ({e}); updating in-process")
+            args.sync = args.sync or args.client == 'sync'
+        except OSError as e:
+            # The daemon may still be updating the project; don't race it
+            print(f"Error: request to the daemon on {args.socket} failed ({e})")
+            sys.exit(1)
+        else:
+            print(reply.get('output') or reply.get('error') or "OK", end='' if reply.get('output') else '\n')
+            return
+
+    options = {'discovery': args.discovery, 'include_untracked': not args.tracked_only, 'fsync': args.fsync,
+               'deterministic_ids': not args.random_ids, 'sync': args.sync, 'target_rules_path': args.targets,
+               'normalize': args.normalize, 'excludes': SourceWalker.DEFAULT_EXCLUDES + tuple(args.exclude)}
+    if args.workspace is not None:
+        workspace_path = args.workspace or Workspace.find()
+        if not workspace_path:
+            print("Error: no .xcworkspace found in current directory")
+            return
+        workspace = Workspace(workspace_path)
+        try:
+            reports = workspace.update(options, force=args.force, jobs=args.jobs)
+        except (OSError, ElementTree.ParseError) as e:
+            print(f"Error: could not read {workspace_path} ({e})")
+            sys.exit(1)
+        if workspace.print_report(reports):
+            sys.exit(1)
+        return
+
     # Check if we're in the right directory
     if not os.path.exists("VoiceControl.xcodeproj"):
         print("Error: VoiceControl.xcodeproj not found in current directory")
         print("Please run this script from the project root directory")
         return
         
-    updater = XcodeProjectUpdater()
-    updater.run()
+    if args.daemon:
+        ProjectDaemon(args.socket, options).serve()
+        return
+    if args.watch:
+        ProjectWatcher(options).watch()
+        return
+
+    updater = XcodeProjectUpdater(**options)
+    if args.profile:
+        updater.profiler = PhaseProfiler(pstats_path=args.pstats, trace_memory=args.profile_memory)
+    updater.run(force=args.force)
+
+    if args.profile:
+        with open(args.profile, 'w') as f:
+            json.dump(updater.profile_report(), f, indent=2)
+        print(f"\nProfile written to {args.profile}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Thin client for the add_files_simple.py daemon
+
+Sends one request line to the daemon's Unix socket and prints the reply.
+Only socket and json are imported, so a round trip costs little more than
+starting the interpreter; the full updater is loaded only when no daemon
+is running and an add or sync has to happen in-process.
+
+Usage:
+    python3 add_files_simple.py --daemon &           # once, from the project root
+    python3 -S scripts/add_files_client.py           # add new files
+    python3 -S scripts/add_files_client.py sync      # also remove deleted ones
+    python3 -S scripts/add_files_client.py ping|shutdown [--socket PATH]
+
+With nc(1), the same request is
+    echo '{"command": "add"}' | nc -U .add_files.sock
+"""
+
+import os
+import sys
+import json
+import socket
+
+COMMANDS = ('add', 'sync', 'ping', 'shutdown')
+DEFAULT_SOCKET = ".add_files.sock"
+UPDATER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'add_files_simple.py')
+
+
+def parse_args(argv):
+    """Return (command, socket path); argparse alone would double the start-up time"""
+    command, socket_path = 'add', DEFAULT_SOCKET
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == '--socket' and args:
+            socket_path = args.pop(0)
+        elif arg.startswith('--socket='):
+            socket_path = arg[len('--socket='):]
+        elif arg in COMMANDS:
+            command = arg
+        else:
+            sys.exit(f"usage: {os.path.basename(sys.argv[0])} [{'|'.join(COMMANDS)}] [--socket PATH]")
+    return command, socket_path
+
+
+def main(argv=None):
+    command, socket_path = parse_args(sys.argv[1:] if argv is None else argv)
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(60)
+            client.connect(socket_path)
+            client.sendall(json.dumps({'command': command}).encode() + b'\n')
+            with client.makefile('rb') as stream:
+                reply = stream.readline()
+    except (ConnectionRefusedError, FileNotFoundError) as e:
+        if command not in ('add', 'sync'):
+            sys.exit(f"Error: no daemon reachable on {socket_path} ({e})")
+        print(f"No daemon reachable on {socket_path} ({e}); updating in-process")
+        sys.stdout.flush()
+        os.execv(sys.executable, [sys.executable, UPDATER] + (['--sync'] if command == 'sync' else []))
+    except OSError as e:
+        # The daemon may still be updating the project; don't race it
+        sys.exit(f"Error: request to the daemon on {socket_path} failed ({e})")
+    if not reply:
+        sys.exit("Error: daemon closed the connection without replying")
+    reply = json.loads(reply)
+    print(reply.get('output') or reply.get('error') or "OK", end='' if reply.get('output') else '\n')
+    if not reply.get('ok'):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for add_files_simple.py
+
+Generates synthetic Xcode projects shaped like VoiceControl.xcodeproj
+(nested groups under a VoiceControl main group, several native targets with
+their own Sources phases) together with a matching source tree, then times
+each phase of XcodeProjectUpdater against them.
+
+Usage:
+    python3 scripts/benchmark_add_files.py
+    python3 scripts/benchmark_add_files.py --sizes 100,1000,10000 --output bench_output.json
+
+Results are written as JSON so runs can be compared across releases.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from add_files_simple import XcodeProjectUpdater
+
+DEFAULT_SIZES = (100, 1000, 10000, 50000, 200000)
+
+SECTION_ORDER = (
+    'PBXBuildFile',
+    'PBXFileReference',
+    'PBXFrameworksBuildPhase',
+    'PBXGroup',
+    'PBXNativeTarget',
+    'PBXProject',
+    'PBXResourcesBuildPhase',
+    'PBXSourcesBuildPhase',
+    'XCBuildConfiguration',
+    'XCConfigurationList',
+)
+
+
+class SyntheticProject:
+    """Builds a synthetic project.pbxproj and the source tree it describes"""
+
+    def __init__(self, file_count, group_count, depth, target_count, new_fraction):
+        self.file_count = file_count
+        self.group_count = max(1, group_count)
+        self.depth = max(1, depth)
+        self.target_count = max(1, target_count)
+        self.new_fraction = new_fraction
+        self.counters = {}
+        self.sections = {isa: [] for isa in SECTION_ORDER}
+
+    def make_id(self, kind):
+        """Return a deterministic 24-character object ID"""
+        self.counters[kind] = self.counters.get(kind, 0) + 1
+        return f"{kind:02X}{self.counters[kind]:022X}"
+
+    def add_object(self, isa, text):
+        self.sections[isa].append(text)
+
+    def group_text(self, group_id, name, children, path=None):
+        lines = [f"\t\t{group_id} /* {name} */ = {{", "\t\t\tisa = PBXGroup;", "\t\t\tchildren = ("]
+        lines.extend(f"\t\t\t\t{child_id} /* {child_name} */," for child_id, child_name in children)
+        lines.append("\t\t\t);")
+        lines.append(f"\t\t\tpath = {path};" if path else f"\t\t\tname = {name};")
+        lines.append('\t\t\tsourceTree = "<group>";')
+        lines.append("\t\t};")
+        return '\n'.join(lines)
+
+    def phase_text(self, phase_id, isa, name, entries):
+        lines = [f"\t\t{phase_id} /* {name} */ = {{", f"\t\t\tisa = {isa};",
+                 "\t\t\tbuildActionMask = 2147483647;", "\t\t\tfiles = ("]
+        lines.extend(f"\t\t\t\t{build_id} /* {label} */," for build_id, label in entries)
+        lines.append("\t\t\t);")
+        lines.append("\t\t\trunOnlyForDeploymentPostprocessing = 0;")
+        lines.append("\t\t};")
+        return '\n'.join(lines)
+
+    def group_dirs(self):
+        """Return the directory of every group, relative to VoiceControl/"""
+        dirs = []
+        for index in range(self.group_count):
+            top = f"Feature{index}"
+            dirs.append(top)
+            current = top
+            for level in range(1, self.depth):
+                current = f"{current}/Level{level}"
+                dirs.append(current)
+        return dirs
+
+    def generate(self, root):
+        """Write the project and its source tree below `root`, returning the project path"""
+        group_dirs = self.group_dirs()
+        files_by_dir = {directory: [] for directory in group_dirs}
+        for index in range(self.file_count):
+            files_by_dir[group_dirs[index % len(group_dirs)]].append(f"File{index}.swift")
+
+        source_root = os.path.join(root, "VoiceControl")
+        for directory, names in files_by_dir.items():
+            os.makedirs(os.path.join(source_root, directory), exist_ok=True)
+            for name in names:
+                open(os.path.join(source_root, directory, name), 'w').close()
+
+        target_ids = [self.make_id(0xA6) for _ in range(self.target_count)]
+        target_sources = {target_id: [] for target_id in target_ids}
+        known_every = int(1 / self.new_fraction) if self.new_fraction else 0
+
+        # Groups are emitted bottom-up so each one knows its subgroup IDs
+        group_ids = {directory: self.make_id(0xA5) for directory in group_dirs}
+        file_index = 0
+        for directory in reversed(group_dirs):
+            children = []
+            for name in files_by_dir[directory]:
+                file_index += 1
+                if known_every and file_index % known_every == 0:
+                    continue  # left out of the project so the updater has work to do
+                file_ref = self.make_id(0xA2)
+                build_ref = self.make_id(0xA1)
+                children.append((file_ref, name))
+                self.add_object('PBXFileReference',
+                                f"\t\t{file_ref} /* {name} */ = {{isa = PBXFileReference; lastKnownFileType = sourcecode.swift; "
+                                f"path = {name}; sourceTree = \"<group>\"; }};")
+                self.add_object('PBXBuildFile',
+                                f"\t\t{build_ref} /* {name} in Sources */ = {{isa = PBXBuildFile; fileRef = {file_ref} /* {name} */; }};")
+                target_sources[target_ids[file_index % len(target_ids)]].append((build_ref, f"{name} in Sources"))
+            subdirs = [d for d in group_dirs if d.rpartition('/')[0] == directory]
+            children = [(group_ids[d], d.rpartition('/')[2]) for d in subdirs] + children
+            self.add_object('PBXGroup', self.group_text(group_ids[directory], directory.rpartition('/')[2],
+                                                       children, directory.rpartition('/')[2]))
+
+        main_group = self.make_id(0xA5)
+        app_group = self.make_id(0xA5)
+        products_group = self.make_id(0xA5)
+        top_level = [(group_ids[d], d) for d in group_dirs if '/' not in d]
+        self.add_object('PBXGroup', self.group_text(app_group, "VoiceControl", top_level, "VoiceControl"))
+
+        product_children = []
+        target_lines = []
+        project_id = self.make_id(0xB0)
+        project_config_list = self.make_id(0xB1)
+        for number, target_id in enumerate(target_ids):
+            name = "VoiceControl" if number == 0 else f"VoiceControlTarget{number}"
+            product_id = self.make_id(0xA3)
+            product_children.append((product_id, f"{name}.app"))
+            self.add_object('PBXFileReference',
+                            f"\t\t{product_id} /* {name}.app */ = {{isa = PBXFileReference; explicitFileType = wrapper.application; "
+                            f"includeInIndex = 0; path = {name}.app; sourceTree = BUILT_PRODUCTS_DIR; }};")
+            sources_id = self.make_id(0xA8)
+            frameworks_id = self.make_id(0xA4)
+            resources_id = self.make_id(0xA9)
+            config_list = self.make_id(0xA7)
+            debug_id = self.make_id(0xB3)
+            release_id = self.make_id(0xB3)
+            self.add_object('PBXSourcesBuildPhase',
+                            self.phase_text(sources_id, 'PBXSourcesBuildPhase', 'Sources', target_sources[target_id]))
+            self.add_object('PBXFrameworksBuildPhase',
+                            self.phase_text(frameworks_id, 'PBXFrameworksBuildPhase', 'Frameworks', []))
+            self.add_object('PBXResourcesBuildPhase',
+                            self.phase_text(resources_id, 'PBXResourcesBuildPhase', 'Resources', []))
+            self.add_object('PBXNativeTarget', '\n'.join([
+                f"\t\t{target_id} /* {name} */ = {{",
+                "\t\t\tisa = PBXNativeTarget;",
+                f"\t\t\tbuildConfigurationList = {config_list} /* Build configuration list for PBXNativeTarget \"{name}\" */;",
+                "\t\t\tbuildPhases = (",
+                f"\t\t\t\t{sources_id} /* Sources */,",
+                f"\t\t\t\t{frameworks_id} /* Frameworks */,",
+                f"\t\t\t\t{resources_id} /* Resources */,",
+                "\t\t\t);",
+                "\t\t\tbuildRules = (",
+                "\t\t\t);",
+                "\t\t\tdependencies = (",
+                "\t\t\t);",
+                f"\t\t\tname = {name};",
+                f"\t\t\tproductName = {name};",
+                f"\t\t\tproductReference = {product_id} /* {name}.app */;",
+                "\t\t\tproductType = \"com.apple.product-type.application\";",
+                "\t\t};",
+            ]))
+            for config_id, config_name in ((debug_id, 'Debug'), (release_id, 'Release')):
+                self.add_object('XCBuildConfiguration', '\n'.join([
+                    f"\t\t{config_id} /* {config_name} */ = {{",
+                    "\t\t\tisa = XCBuildConfiguration;",
+                    "\t\t\tbuildSettings = {",
+                    "\t\t\t\tPRODUCT_NAME = \"$(TARGET_NAME)\";",
+                    "\t\t\t\tSWIFT_VERSION = 5.0;",
+                    "\t\t\t};",
+                    f"\t\t\tname = {config_name};",
+                    "\t\t};",
+                ]))
+            target_lines.append(f"\t\t\t\t{target_id} /* {name} */,")
+            self.add_object('XCConfigurationList', '\n'.join([
+                f"\t\t{config_list} /* Build configuration list for PBXNativeTarget \"{name}\" */ = {{",
+                "\t\t\tisa = XCConfigurationList;",
+                "\t\t\tbuildConfigurations = (",
+                f"\t\t\t\t{debug_id} /* Debug */,",
+                f"\t\t\t\t{release_id} /* Release */,",
+                "\t\t\t);",
+                "\t\t\tdefaultConfigurationIsVisible = 0;",
+                "\t\t\tdefaultConfigurationName = Release;",
+                "\t\t};",
+            ]))
+
+        self.add_object('PBXGroup', self.group_text(products_group, "Products", product_children))
+        self.add_object('PBXGroup', '\n'.join([
+            f"\t\t{main_group} = {{",
+            "\t\t\tisa = PBXGroup;",
+            "\t\t\tchildren = (",
+            f"\t\t\t\t{app_group} /* VoiceControl */,",
+            f"\t\t\t\t{products_group} /* Products */,",
+            "\t\t\t);",
+            "\t\t\tsourceTree = \"<group>\";",
+            "\t\t};",
+        ]))
+        self.add_object('XCConfigurationList', '\n'.join([
+            f"\t\t{project_config_list} /* Build configuration list for PBXProject \"VoiceControl\" */ = {{",
+            "\t\t\tisa = XCConfigurationList;",
+            "\t\t\tbuildConfigurations = (",
+            "\t\t\t);",
+            "\t\t\tdefaultConfigurationIsVisible = 0;",
+            "\t\t\tdefaultConfigurationName = Release;",
+            "\t\t};",
+        ]))
+        self.add_object('PBXProject', '\n'.join([
+            f"\t\t{project_id} /* Project object */ = {{",
+            "\t\t\tisa = PBXProject;",
+            f"\t\t\tbuildConfigurationList = {project_config_list} /* Build configuration list for PBXProject \"VoiceControl\" */;",
+            "\t\t\tcompatibilityVersion = \"Xcode 14.0\";",
+            f"\t\t\tmainGroup = {main_group};",
+            f"\t\t\tproductRefGroup = {products_group} /* Products */;",
+            "\t\t\tprojectDirPath = \"\";",
+            "\t\t\tprojectRoot = \"\";",
+            "\t\t\ttargets = (",
+            *target_lines,
+            "\t\t\t);",
+            "\t\t};",
+        ]))
+
+        lines = ["// !$*UTF8*$!", "{", "\tarchiveVersion = 1;", "\tclasses = {", "\t};",
+                 "\tobjectVersion = 56;", "\tobjects = {"]
+        for isa in SECTION_ORDER:
+            lines.append("")
+            lines.append(f"/* Begin {isa} section */")
+            lines.extend(self.sections[isa])
+            lines.append(f"/* End {isa} section */")
+        lines.extend(["\t};", f"\trootObject = {project_id} /* Project object */;", "}", ""])
+
+        project_dir = os.path.join(root, "VoiceControl.xcodeproj")
+        os.makedirs(project_dir, exist_ok=True)
+        project_path = os.path.join(project_dir, "project.pbxproj")
+        with open(project_path, 'w') as f:
+            f.write('\n'.join(lines))
+        return project_path
+
+
+def time_phases(updater):
+    """Run every updater phase once and return their wall times in seconds"""
+    phases = (
+        ('read', updater.read_project),
+        ('parse', updater.parse_project),
+        ('extract', updater.extract_existing_files),
+        ('discover', updater.find_new_source_files),
+        ('update', updater.update_project),
+        ('write', updater.write_project),
+    )
+    timings = {}
+    for name, phase in phases:
+        start = time.perf_counter()
+        phase()
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def benchmark_size(file_count, args):
+    """Generate one synthetic project and time the updater against it"""
+    group_count = args.groups or max(1, file_count // 40)
+    workdir = tempfile.mkdtemp(prefix="add_files_bench_")
+    previous_dir = os.getcwd()
+    try:
+        generator = SyntheticProject(file_count, group_count, args.depth, args.targets, args.new_fraction)
+        project_path = generator.generate(workdir)
+        os.chdir(workdir)
+        project_bytes = os.path.getsize(project_path)
+
+        pristine_path = project_path + ".orig"
+        shutil.copyfile(project_path, pristine_path)
+
+        runs = []
+        for _ in range(args.repeat):
+            # Each repeat starts from the generated project and a cold scan cache
+            shutil.copyfile(pristine_path, project_path)
+            if os.path.exists(".add_files_scan_cache.json"):
+                os.unlink(".add_files_scan_cache.json")
+            updater = XcodeProjectUpdater(stamp_path=None, snapshot_path=None)
+            runs.append(time_phases(updater))
+            new_files = len(updater.files_to_add)
+
+        best = {name: min(run[name] for run in runs) for name in runs[0]}
+        return {
+            'files': file_count,
+            'groups': group_count,
+            'depth': args.depth,
+            'targets': args.targets,
+            'new_files': new_files,
+            'pbxproj_bytes': project_bytes,
+            'objects': sum(len(entries) for entries in generator.sections.values()),
+            'phases': best,
+            'total': sum(best.values()),
+        }
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def git_revision():
+    """Return the current commit of the repository, if available"""
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark XcodeProjectUpdater on synthetic projects")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="comma-separated file counts to benchmark")
+    parser.add_argument('--groups', type=int, default=0,
+                        help="top-level groups per project (default: one per 40 files)")
+    parser.add_argument('--depth', type=int, default=3, help="nesting depth of each group")
+    parser.add_argument('--targets', type=int, default=3, help="native targets per project")
+    parser.add_argument('--new-fraction', type=float, default=0.1,
+                        help="fraction of files on disk that are missing from the project")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per size; the fastest is reported")
+    parser.add_argument('--output', default="bench_output.json", help="where to write the JSON results")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    return args
+
+
+def main(argv=None):
+    """Main entry point"""
+    args = parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+
+    results = []
+    for file_count in sizes:
+        print(f"Benchmarking {file_count} files...")
+        result = benchmark_size(file_count, args)
+        phases = ', '.join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in result['phases'].items())
+        print(f"  {result['total'] * 1000:.1f}ms total ({phases})")
+        results.append(result)
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
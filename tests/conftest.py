@@ -0,0 +1,15 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+PROJECT_PATH = ROOT / "VoiceControl.xcodeproj" / "project.pbxproj"
+
+
+@pytest.fixture
+def project_text():
+    """Bytes of the repository's own project.pbxproj"""
+    return PROJECT_PATH.read_bytes()
@@ -0,0 +1,131 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from add_files_simple import GitIndex, GitIndexError, IgnoreRules, SourceWalker, XcodeProjectUpdater
+
+needs_git = pytest.mark.skipif(shutil.which('git') is None, reason="git is not installed")
+
+
+def git(repo, *args):
+    subprocess.run(['git', '-C', str(repo), *args], check=True, capture_output=True)
+
+
+def make_repo(tmp_path, files, index_version=2):
+    for path in files:
+        full_path = tmp_path / path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text('')
+    git(tmp_path, 'init', '-q')
+    git(tmp_path, 'config', 'index.version', str(index_version))
+    git(tmp_path, 'add', '.')
+    # Directories must be older than the index for it to vouch for them
+    stamp = os.stat(tmp_path / '.git' / 'index').st_mtime_ns - 10**9
+    for directory, _, _ in os.walk(tmp_path / 'Sources'):
+        os.utime(directory, ns=(stamp, stamp))
+    return tmp_path
+
+
+def discover(repo, include_untracked=True):
+    updater = XcodeProjectUpdater(discovery='git', include_untracked=include_untracked, stamp_path=None,
+                                  scan_cache_path=None)
+    walker = SourceWalker(str(repo / 'Sources'), repo_root=str(repo))
+    return sorted(updater.discover_files(str(repo / 'Sources'), walker)), walker
+
+
+@needs_git
+def test_unchanged_tree_lists_no_directories(tmp_path):
+    repo = make_repo(tmp_path, ['Sources/App.swift', 'Sources/Core/Engine.swift', 'Sources/Core/Deep/Model.swift'])
+    paths, walker = discover(repo)
+    assert paths == ['App.swift', 'Core/Deep/Model.swift', 'Core/Engine.swift']
+    assert walker.listed == {}
+
+
+@needs_git
+def test_untracked_files_are_found_in_modified_directories(tmp_path):
+    repo = make_repo(tmp_path, ['Sources/App.swift', 'Sources/Core/Engine.swift'])
+    (repo / 'Sources' / 'Core' / 'New.swift').write_text('')
+    (repo / 'Sources' / 'Fresh' / 'Deep').mkdir(parents=True)
+    (repo / 'Sources' / 'Fresh' / 'Deep' / 'Other.swift').write_text('')
+    paths, walker = discover(repo)
+    assert paths == ['App.swift', 'Core/Engine.swift', 'Core/New.swift', 'Fresh/Deep/Other.swift']
+    assert discover(repo, include_untracked=False)[0] == ['App.swift', 'Core/Engine.swift']
+
+
+@needs_git
+def test_tracked_files_deleted_from_the_worktree_are_dropped(tmp_path):
+    repo = make_repo(tmp_path, ['Sources/App.swift', 'Sources/Core/Engine.swift', 'Sources/Gone/Old.swift'])
+    (repo / 'Sources' / 'Core' / 'Engine.swift').unlink()
+    shutil.rmtree(repo / 'Sources' / 'Gone')
+    assert discover(repo)[0] == ['App.swift']
+
+
+@needs_git
+@pytest.mark.parametrize('index_version', [2, 3, 4])
+def test_git_index_paths(tmp_path, index_version):
+    files = ['Sources/App.swift', 'Sources/Core/Engine.swift', 'Sources/Core/Engine+Extras.swift',
+             'Sources/Résumé.swift', 'Tests/AppTests.swift', 'README.md']
+    repo = make_repo(tmp_path, files, index_version)
+    git(repo, 'update-index', '--skip-worktree', 'Sources/Core/Engine+Extras.swift')
+    index = GitIndex(str(repo / '.git'))
+    assert sorted(index.paths()) == sorted(files[:2] + files[3:])
+    assert sorted(index.paths('Sources/')) == ['App.swift', 'Core/Engine.swift', 'Résumé.swift']
+    assert list(index.paths('Nothing/')) == []
+
+
+def test_git_index_rejects_other_files(tmp_path):
+    (tmp_path / 'index').write_bytes(b'NOPE' + bytes(20))
+    with pytest.raises(GitIndexError):
+        list(GitIndex(str(tmp_path)).paths())
+    (tmp_path / 'index').write_bytes(b'DIRC')
+    with pytest.raises(GitIndexError):
+        list(GitIndex(str(tmp_path)).paths())
+
+
+def test_git_index_find_follows_gitdir_files(tmp_path):
+    (tmp_path / 'real.git').mkdir()
+    (tmp_path / 'work' / 'Sources').mkdir(parents=True)
+    (tmp_path / 'work' / '.git').write_text('gitdir: ../real.git\n')
+    work_tree, git_dir = GitIndex.find(str(tmp_path / 'work' / 'Sources'))
+    assert work_tree == str(tmp_path / 'work')
+    assert os.path.normpath(git_dir) == str(tmp_path / 'real.git')
+
+
+@pytest.mark.parametrize('pattern, regex', [
+    ('*.swift', '[^/]*\\.swift'),
+    ('Foo?.m', 'Foo[^/]\\.m'),
+    ('**/build', '(?:.*/)?build'),
+    ('docs/**', 'docs/.*'),
+    ('a/**/b', 'a/(?:.*/)?b'),
+    ('[!a]bc', '[^a]bc'),
+    ('[abc', '\\[abc'),
+])
+def test_ignore_translate(pattern, regex):
+    assert IgnoreRules.translate(pattern) == regex
+
+
+@pytest.mark.parametrize('path, is_dir, ignored', [
+    ('build', True, True),
+    ('Sources/build', True, True),
+    ('build', False, False),
+    ('Sources/Generated/Model.swift', False, True),
+    ('Generated/Model.swift', False, False),
+    ('Sources/Keep.generated.swift', False, False),
+    ('Sources/Other.generated.swift', False, True),
+    ('notes.txt', False, False),
+])
+def test_ignore_rules(path, is_dir, ignored):
+    rules = IgnoreRules(['# comment', '', 'build/', 'Sources/Generated/', '*.generated.swift',
+                         '!Keep.generated.swift'])
+    rules.add_pattern('Model.swift', base='Sources/Generated/')
+    assert rules.ignored(path, is_dir) == ignored
+
+
+def test_ignore_rules_with_base():
+    rules = IgnoreRules()
+    rules.add_pattern('/Local.swift', base='Sources/')
+    assert rules.ignored('Sources/Local.swift', False)
+    assert not rules.ignored('Sources/Deep/Local.swift', False)
+    assert not rules.ignored('Local.swift', False)
@@ -0,0 +1,114 @@
+import pytest
+
+from add_files_simple import ProjectEditor, ProjectGraph, ProjectMerger, merge_driver
+
+TARGET_ID = 'A6000001000000000000001'
+UTILS_GROUP_ID = 'A5000009000000000000009'
+SOURCES_PHASE_ID = 'A8000001000000000000001'
+EMBED_PHASE_ID = 'B00A55366423D76D246A2929'
+TEXT_SELECTION_ID = 'A2000011000000000000011'
+
+
+def edit(text, change):
+    """Return `text` after change(editor, graph)"""
+    graph = ProjectGraph(text)
+    editor = ProjectEditor(graph)
+    change(editor, graph)
+    return editor.serialize()
+
+
+def add_swift_file(text, name, file_id, build_id):
+    def change(editor, graph):
+        editor.add_object(build_id, {'isa': 'PBXBuildFile', 'fileRef': (file_id, name)}, f"{name} in Sources")
+        editor.add_object(file_id, {'isa': 'PBXFileReference', 'lastKnownFileType': 'sourcecode.swift',
+                                    'path': name, 'sourceTree': '<group>'}, name)
+        editor.append_items(graph.objects[UTILS_GROUP_ID]['children'], [(file_id, name)])
+        editor.append_items(graph.objects[SOURCES_PHASE_ID]['files'], [(build_id, f"{name} in Sources")])
+    return edit(text, change)
+
+
+def run_driver(tmp_path, base, ours, theirs):
+    paths = []
+    for name, text in (('base', base), ('ours', ours), ('theirs', theirs)):
+        path = tmp_path / name
+        path.write_bytes(text)
+        paths.append(str(path))
+    status = merge_driver(*paths)
+    return status, (tmp_path / 'ours').read_bytes()
+
+
+def test_both_sides_add_files(tmp_path, project_text):
+    ours = add_swift_file(project_text, 'Ours.swift', 'AA0000000000000000000001', 'AA0000000000000000000002')
+    theirs = add_swift_file(project_text, 'Theirs.swift', 'BB0000000000000000000001', 'BB0000000000000000000002')
+    status, merged = run_driver(tmp_path, project_text, ours, theirs)
+    assert status == 0
+    graph = ProjectGraph(merged)
+    assert {'VoiceControl/Utils/Ours.swift', 'VoiceControl/Utils/Theirs.swift'} <= set(graph.file_paths())
+    files = graph.objects[SOURCES_PHASE_ID]['files']
+    assert files[-2:] == ['AA0000000000000000000002', 'BB0000000000000000000002']
+    assert b'BB0000000000000000000002 /* Theirs.swift in Sources */,' in merged
+
+
+def test_quoted_scalar_property(tmp_path, project_text):
+    ours = edit(project_text, lambda editor, graph: editor.set_property(TARGET_ID, 'productName', 'VoiceApp'))
+    theirs = edit(project_text, lambda editor, graph: editor.set_property(TARGET_ID, 'name', 'Voice Control'))
+    status, merged = run_driver(tmp_path, project_text, ours, theirs)
+    assert status == 0
+    target = ProjectGraph(merged).objects[TARGET_ID]
+    assert (target['name'], target['productName']) == ('Voice Control', 'VoiceApp')
+    assert b'name = "Voice Control";' in merged
+
+
+def test_quoted_list_property(tmp_path, project_text):
+    def adding(path):
+        return lambda editor, graph: editor.append_items(graph.objects[EMBED_PHASE_ID]['inputFileListPaths'], [path])
+    ours = edit(project_text, adding('$(SRCROOT)/ours.xcfilelist'))
+    theirs = edit(project_text, adding('$(SRCROOT)/theirs.xcfilelist'))
+    status, merged = run_driver(tmp_path, project_text, ours, theirs)
+    assert status == 0
+    paths = ProjectGraph(merged).objects[EMBED_PHASE_ID]['inputFileListPaths']
+    assert paths[1:] == ['$(SRCROOT)/ours.xcfilelist', '$(SRCROOT)/theirs.xcfilelist']
+
+
+def test_delete_against_modify_conflicts(tmp_path, project_text):
+    ours = edit(project_text, lambda editor, graph: editor.remove_object(TEXT_SELECTION_ID))
+    theirs = edit(project_text, lambda editor, graph: editor.set_property(TEXT_SELECTION_ID, 'path', 'Selection.swift'))
+    merger = ProjectMerger(project_text, ours, theirs)
+    merged = merger.merge()
+    assert merger.conflicts == [(TEXT_SELECTION_ID, ['(deleted)'])]
+    assert b'<<<<<<< ours\n=======\n' in merged
+    assert run_driver(tmp_path, project_text, ours, theirs)[0] == 1
+
+
+def test_delete_against_untouched_is_taken(tmp_path, project_text):
+    theirs = edit(project_text, lambda editor, graph: editor.remove_object(TEXT_SELECTION_ID))
+    status, merged = run_driver(tmp_path, project_text, project_text, theirs)
+    assert status == 0
+    assert TEXT_SELECTION_ID not in ProjectGraph(merged).objects
+
+
+def test_same_property_changed_differently_conflicts(tmp_path, project_text):
+    ours = edit(project_text, lambda editor, graph: editor.set_property(TARGET_ID, 'name', 'Ours'))
+    theirs = edit(project_text, lambda editor, graph: editor.set_property(TARGET_ID, 'name', 'Theirs'))
+    merger = ProjectMerger(project_text, ours, theirs)
+    merged = merger.merge()
+    assert merger.conflicts == [(TARGET_ID, ['name'])]
+    assert merged.count(b'<<<<<<< ours') == 1
+    assert run_driver(tmp_path, project_text, ours, theirs)[0] == 1
+
+
+def test_unparsable_merge_becomes_a_conflict(tmp_path, project_text, monkeypatch):
+    monkeypatch.setattr(ProjectMerger, 'merge', lambda self: b'{ objects = {')
+    ours = edit(project_text, lambda editor, graph: editor.set_property(TARGET_ID, 'name', 'Ours'))
+    status, merged = run_driver(tmp_path, project_text, ours, project_text)
+    assert status == 1
+    assert merged.startswith(b'<<<<<<< ours\n' + ours + b'=======\n')
+
+
+@pytest.mark.parametrize('side', ['ours', 'theirs'])
+def test_one_sided_change_merges_cleanly(tmp_path, project_text, side):
+    changed = add_swift_file(project_text, 'New.swift', 'CC0000000000000000000001', 'CC0000000000000000000002')
+    texts = {'ours': project_text, 'theirs': project_text, side: changed}
+    status, merged = run_driver(tmp_path, project_text, texts['ours'], texts['theirs'])
+    assert status == 0
+    assert ProjectGraph(merged).objects == ProjectGraph(changed).objects
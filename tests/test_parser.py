@@ -0,0 +1,96 @@
+import pytest
+
+from add_files_simple import PbxList, PbxprojParseError, PbxprojParser, ProjectGraph, iter_objects
+
+from conftest import PROJECT_PATH
+
+SAMPLE = b'''// !$*UTF8*$!
+{
+	archiveVersion = 1;
+	objects = {
+
+/* Begin PBXFileReference section */
+		AB /* App.swift */ = {isa = PBXFileReference; path = App.swift; sourceTree = "<group>"; };
+		"CD" = {isa = PBXFileReference; name = "Tab\\there \\"quoted\\""; path = "a/b.swift"; };
+/* End PBXFileReference section */
+
+/* Begin PBXGroup section */
+		EF = {
+			isa = PBXGroup;
+			children = (
+				AB /* App.swift */,
+				CD,
+			);
+			settings = {ATTRIBUTES = (Public, ); };
+		};
+/* End PBXGroup section */
+	};
+	rootObject = EF;
+}
+'''
+
+
+def test_parse_values():
+    root = PbxprojParser(SAMPLE).parse()
+    assert root['archiveVersion'] == '1'
+    assert root['rootObject'] == 'EF'
+    objects = root['objects']
+    assert objects['AB'] == {'isa': 'PBXFileReference', 'path': 'App.swift', 'sourceTree': '<group>'}
+    assert objects['CD']['name'] == 'Tab\there "quoted"'
+    assert objects['EF']['children'] == ['AB', 'CD']
+    assert objects['EF']['settings'] == {'ATTRIBUTES': ['Public']}
+
+
+def test_lists_remember_their_brackets():
+    parser = PbxprojParser(SAMPLE)
+    children = parser.parse()['objects']['EF']['children']
+    assert isinstance(children, PbxList)
+    assert SAMPLE[children.open:children.open + 1] == b'('
+    assert SAMPLE[children.close:children.close + 1] == b')'
+
+
+def test_object_spans():
+    parser = PbxprojParser(SAMPLE)
+    parser.parse()
+    start, end = parser.spans['AB']
+    assert SAMPLE[start:end].startswith(b'AB /* App.swift */ = {isa')
+    assert SAMPLE[start:end].endswith(b'};')
+    start, end = parser.spans['CD']
+    assert SAMPLE[start:end].startswith(b'"CD" = {')
+
+
+@pytest.mark.parametrize('text', [
+    b'{ a = b; ',
+    b'{ a = b }',
+    b'{ a = (b c); }',
+    b'{ a = b; } trailing',
+    b'( a, )',
+    b'{ a = "\xff"; }',
+    b'{ (a) = b; }',
+])
+def test_malformed_input_is_rejected(text):
+    with pytest.raises(PbxprojParseError):
+        PbxprojParser(text).parse()
+
+
+def test_objects_stream_matches_parse():
+    assert dict(PbxprojParser(SAMPLE).objects()) == PbxprojParser(SAMPLE).parse()['objects']
+
+
+def test_iter_objects_reads_only_requested_sections(tmp_path):
+    path = tmp_path / 'project.pbxproj'
+    path.write_bytes(SAMPLE)
+    assert [object_id for object_id, _ in iter_objects(str(path))] == ['AB', 'CD', 'EF']
+    assert [object_id for object_id, _ in iter_objects(str(path), 'PBXGroup')] == ['EF']
+    assert [object_id for object_id, _ in iter_objects(str(path), ('PBXGroup', 'PBXFileReference'))] == \
+        ['AB', 'CD', 'EF']
+
+
+def test_repository_project(project_text):
+    graph = ProjectGraph(project_text)
+    assert dict(iter_objects(str(PROJECT_PATH))) == graph.objects
+    assert 'VoiceControl/Utils/TextSelection.swift' in graph.file_paths()
+    assert graph.group_dirs()['VoiceControl/Utils'] == 'A5000009000000000000009'
+    for object_id, (start, end) in graph.spans.items():
+        assert ProjectGraph(b'{objects = {' + project_text[start:end] + b'};}').objects[object_id] == \
+            graph.objects[object_id]
@@ -0,0 +1,130 @@
+import pytest
+
+from add_files_simple import PbxprojParseError, ProjectEditor, ProjectGraph
+
+TARGET_ID = 'A6000001000000000000001'
+
+
+def edited(graph, edit):
+    """Apply `edit` to a ProjectEditor on `graph` and return the re-parsed result"""
+    editor = ProjectEditor(graph)
+    edit(editor)
+    return ProjectGraph(editor.serialize())
+
+
+def test_serialize_without_edits_is_identity(project_text):
+    assert ProjectEditor(ProjectGraph(project_text)).serialize() == project_text
+
+
+def test_property_spans_cover_quoted_tokens():
+    graph = ProjectGraph(b'{ objects = { AB = {isa = PBXGroup; name = "Voice Control"; "sourceTree" = "<group>"; }; }; }')
+    properties = graph.property_spans('AB')
+    key_start, value_start, value_end, _ = properties['name']
+    assert graph.text[value_start:value_end] == b'"Voice Control"'
+    key_start, value_start, value_end, _ = properties['sourceTree']
+    assert graph.text[key_start:key_start + 12] == b'"sourceTree"'
+    assert graph.text[value_start:value_end] == b'"<group>"'
+
+
+@pytest.mark.parametrize('value', ['Voice Control', 'VoiceControl', 'Quote " and \\ backslash', 'Foo-Bar'])
+def test_set_property_round_trip(project_text, value):
+    result = edited(ProjectGraph(project_text), lambda editor: editor.set_property(TARGET_ID, 'name', value))
+    assert result.objects[TARGET_ID]['name'] == value
+    assert result.objects[TARGET_ID]['productName'] == 'VoiceControl'
+
+
+def test_set_property_replaces_a_quoted_value(project_text):
+    graph = ProjectGraph(project_text)
+    graph = edited(graph, lambda editor: editor.set_property(TARGET_ID, 'name', 'Voice Control'))
+    result = edited(graph, lambda editor: editor.set_property(TARGET_ID, 'name', 'Voice Control 2'))
+    assert result.objects[TARGET_ID]['name'] == 'Voice Control 2'
+
+
+def test_set_property_adds_a_missing_key_in_order(project_text):
+    result = edited(ProjectGraph(project_text),
+                    lambda editor: editor.set_property(TARGET_ID, 'comments', 'Built by "CI"'))
+    assert result.objects[TARGET_ID]['comments'] == 'Built by "CI"'
+    keys = list(result.objects[TARGET_ID])
+    assert keys.index('comments') < keys.index('dependencies')
+
+
+def test_property_without_value_is_rejected():
+    graph = ProjectGraph(b'{ objects = { AB = {isa = PBXGroup; name = x; }; }; }')
+    graph.text = b'{ objects = { AB = {isa = PBXGroup; name = ; }; }; }'
+    with pytest.raises(PbxprojParseError):
+        graph.property_spans('AB')
+
+
+EMBED_PHASE_ID = 'B00A55366423D76D246A2929'
+CHECK_PHASE_ID = 'DA16A76EDCEE3E8A860B64B7'
+
+
+def test_list_items_cover_quoted_elements(project_text):
+    graph = ProjectGraph(project_text)
+    items = graph.list_items(graph.objects[CHECK_PHASE_ID]['inputPaths'])
+    assert [item for item, _, _ in items] == graph.objects[CHECK_PHASE_ID]['inputPaths']
+    for item, start, end in items:
+        assert graph.text[start:end] == b'"' + item.encode() + b'",'
+
+
+def test_list_items_unescape_quoted_elements():
+    graph = ProjectGraph(b'{ objects = { AB = {isa = PBXGroup; children = ("a\\"b", c); }; }; }')
+    assert [item for item, _, _ in graph.list_items(graph.objects['AB']['children'])] == \
+        graph.objects['AB']['children'] == ['a"b', 'c']
+
+
+def test_remove_quoted_items(project_text):
+    graph = ProjectGraph(project_text)
+    result = edited(graph, lambda editor: editor.remove_items(graph.objects[CHECK_PHASE_ID]['inputPaths'],
+                                                               {'${PODS_ROOT}/Manifest.lock'}))
+    assert result.objects[CHECK_PHASE_ID]['inputPaths'] == ['${PODS_PODFILE_DIR_PATH}/Podfile.lock']
+    # The whole line goes, quotes included
+    assert result.text == project_text.replace(b'\t\t\t\t"${PODS_ROOT}/Manifest.lock",\n', b'', 1)
+
+
+def test_append_and_sort_quoted_items(project_text):
+    graph = ProjectGraph(project_text)
+    graph = edited(graph, lambda editor: editor.append_items(graph.objects[EMBED_PHASE_ID]['inputFileListPaths'],
+                                                              ['$(SRCROOT)/extra.xcfilelist']))
+    assert graph.objects[EMBED_PHASE_ID]['inputFileListPaths'][-1] == '$(SRCROOT)/extra.xcfilelist'
+    result = edited(graph, lambda editor: editor.sort_items(graph.objects[EMBED_PHASE_ID]['inputFileListPaths'], str))
+    assert result.objects[EMBED_PHASE_ID]['inputFileListPaths'] == \
+        sorted(graph.objects[EMBED_PHASE_ID]['inputFileListPaths'])
+
+
+def test_add_object_opens_a_missing_section_in_isa_order(project_text):
+    graph = ProjectGraph(project_text)
+    editor = ProjectEditor(graph)
+    editor.add_object('AA0000000000000000000001', {
+        'isa': 'PBXVariantGroup',
+        'children': [],
+        'name': 'Localizable.strings',
+        'sourceTree': '<group>',
+    }, 'Localizable.strings')
+    text = editor.serialize()
+    result = ProjectGraph(text)
+    assert result.objects['AA0000000000000000000001']['name'] == 'Localizable.strings'
+    begin, end = result.section_range('PBXVariantGroup')
+    assert result.section_range('PBXSourcesBuildPhase')[1] < begin < end < result.section_range('XCBuildConfiguration')[0]
+
+
+def test_remove_section_restores_the_original(project_text):
+    graph = ProjectGraph(project_text)
+    editor = ProjectEditor(graph)
+    editor.add_object('AA0000000000000000000001', {'isa': 'PBXVariantGroup', 'children': [],
+                                                   'name': 'Localizable.strings', 'sourceTree': '<group>'})
+    graph = ProjectGraph(editor.serialize())
+    editor = ProjectEditor(graph)
+    assert editor.remove_section('PBXVariantGroup')
+    assert editor.serialize() == project_text
+
+
+def test_inline_objects_stay_on_one_line(project_text):
+    graph = ProjectGraph(project_text)
+    editor = ProjectEditor(graph)
+    editor.add_object('AA0000000000000000000001', {'isa': 'PBXFileReference', 'path': 'New File.swift',
+                                                   'sourceTree': '<group>'}, 'New File.swift')
+    text = editor.serialize()
+    assert (b'\t\tAA0000000000000000000001 /* New File.swift */ = {isa = PBXFileReference; '
+            b'path = "New File.swift"; sourceTree = "<group>"; };\n') in text
+    assert ProjectGraph(text).objects['AA0000000000000000000001']['path'] == 'New File.swift'